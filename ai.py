@@ -4,16 +4,19 @@
 每個 AI 行為都是一個獨立的類別
 """
 import pygame
-import random
 import math
+import numpy as np
+import rng
+from spatial import nearest_in
+from navigation import route, route_batch, chase, chase_batch
 
 class AIBehavior:
     """AI 行為基礎類別"""
     def __init__(self, entity):
         self.entity = entity
         
-    def update(self, physics, player, enemies=None):
-        """更新 AI 行為 - 子類別需要實作這個方法"""
+    def update(self, physics, player, enemies=None, nav=None):
+        """更新 AI 行為 - 子類別需要實作這個方法；nav 是遊戲的 Navigation（路徑快取與流場），用來繞過障礙"""
         pass
 
 class FollowPlayerAI(AIBehavior):
@@ -23,12 +26,13 @@ class FollowPlayerAI(AIBehavior):
         self.follow_distance = follow_distance
         self.stop_distance = stop_distance
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         diff = player.pos - self.entity.pos
         dist = diff.length()
         
         if dist > self.follow_distance:
-            # 距離太遠，追上去
+            # 距離太遠，追上去（被障礙擋住時繞路）
+            diff = chase(nav, self.entity.pos, player, diff)
             diff.normalize_ip()
             self.entity.vel += diff * self.entity.speed
             
@@ -52,12 +56,13 @@ class GuardPositionAI(AIBehavior):
         self.guard_pos = entity.pos.copy()  # 記住初始位置
         self.guard_radius = guard_radius
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         # 計算離守衛點的距離
         diff = self.guard_pos - self.entity.pos
         dist = diff.length()
         
         if dist > 10:  # 如果離守衛點太遠
+            diff = route(nav, self.entity.pos, self.guard_pos, diff)
             diff.normalize_ip()
             self.entity.vel += diff * self.entity.speed * 0.5
         else:
@@ -74,7 +79,7 @@ class PatrolAI(AIBehavior):
         self.wait_timer = 0
         self.wait_duration = 60  # 到達目標後等待的幀數
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         if self.wait_timer > 0:
             self.wait_timer -= 1
             self.entity.vel *= 0.9
@@ -89,6 +94,7 @@ class PatrolAI(AIBehavior):
             self.wait_timer = self.wait_duration
             self.entity.facing_right = self.target_offset > 0
         else:
+            diff = route(nav, self.entity.pos, target, diff)
             diff.normalize_ip()
             self.entity.vel += diff * self.entity.speed * 0.5
             self.entity.facing_right = diff.x > 0
@@ -100,25 +106,19 @@ class AggressiveAI(AIBehavior):
         self.attack_range = attack_range
         self.chase_range = chase_range
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         if not enemies:
             # 沒有敵人，跟隨玩家
             diff = player.pos - self.entity.pos
             dist = diff.length()
             if dist > 100:
+                diff = chase(nav, self.entity.pos, player, diff)
                 diff.normalize_ip()
                 self.entity.vel += diff * self.entity.speed * 0.5
             return
             
-        # 找最近的敵人
-        closest_enemy = None
-        min_dist = float('inf')
-        
-        for enemy in enemies:
-            dist = (enemy.pos - self.entity.pos).length()
-            if dist < min_dist:
-                min_dist = dist
-                closest_enemy = enemy
+        # 找最近的敵人（只需要追擊範圍內的）
+        closest_enemy, min_dist = nearest_in(enemies, self.entity.pos, self.chase_range)
                 
         if closest_enemy and min_dist < self.chase_range:
             diff = closest_enemy.pos - self.entity.pos
@@ -139,7 +139,17 @@ class FleeAI(AIBehavior):
         super().__init__(entity)
         self.flee_distance = flee_distance
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
+        if nav and nav.influence.active:
+            # 沿威脅影響圖往危險較低的方向逃
+            away = nav.influence.escape(self.entity.pos, self.flee_distance)
+            if away:
+                diff = pygame.math.Vector2(away)
+                diff.normalize_ip()
+                self.entity.vel += diff * self.entity.speed * 1.5
+                self.entity.facing_right = diff.x > 0
+            return
+
         if not enemies:
             return
             
@@ -168,12 +178,13 @@ class WanderAI(AIBehavior):
         self.wait_timer = 0
         
     def get_random_target(self):
-        angle = random.uniform(0, math.pi * 2)
-        dist = random.uniform(50, self.wander_radius)
+        rand = rng.stream("wander")
+        angle = rand.uniform(0, math.pi * 2)
+        dist = rand.uniform(50, self.wander_radius)
         offset = pygame.math.Vector2(math.cos(angle) * dist, math.sin(angle) * dist)
         return self.home_pos + offset
         
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         if self.wait_timer > 0:
             self.wait_timer -= 1
             self.entity.vel *= 0.95
@@ -184,8 +195,9 @@ class WanderAI(AIBehavior):
         
         if dist < 30:  # 到達目標
             self.target = self.get_random_target()
-            self.wait_timer = random.randint(30, 120)
+            self.wait_timer = rng.stream("wander").randint(30, 120)
         else:
+            diff = route(nav, self.entity.pos, self.target, diff)
             diff.normalize_ip()
             self.entity.vel += diff * self.entity.speed * 0.3
             self.entity.facing_right = diff.x > 0
@@ -212,13 +224,244 @@ class CommandableAI(AIBehavior):
                 # Reset guard position to current position
                 self.guard_ai.guard_pos = self.entity.pos.copy()
             
-    def update(self, physics, player, enemies=None):
+    def update(self, physics, player, enemies=None, nav=None):
         if self.mode == "follow":
-            self.follow_ai.update(physics, player, enemies)
+            self.follow_ai.update(physics, player, enemies, nav)
         elif self.mode == "attack":
-            self.attack_ai.update(physics, player, enemies)
+            self.attack_ai.update(physics, player, enemies, nav)
         elif self.mode == "defend":
-            self.guard_ai.update(physics, player, enemies)
+            self.guard_ai.update(physics, player, enemies, nav)
+
+def active_behavior(ai):
+    """實際執行的行為（CommandableAI 依目前模式選出子行為）"""
+    if isinstance(ai, CommandableAI):
+        if ai.mode == "follow":
+            return ai.follow_ai
+        if ai.mode == "attack":
+            return ai.attack_ai
+        if ai.mode == "defend":
+            return ai.guard_ai
+        return None
+    return ai
+
+class BatchAI:
+    """
+    批次 AI 執行器
+    每幀先把單位依行為類型（CommandableAI 依目前模式）分組，打包成陣列後以 NumPy 一次算出整組的速度與朝向，
+    運算順序與逐一執行的 update() 相同，結果一致；單位輪到時才以 apply() 套用
+    結果算出後若敵人群組有變動，依賴敵人的結果作廢，改跑原本的逐一 AI
+    """
+    def __init__(self):
+        self.results = {}  # entity -> (vx, vy, facing: -1 unchanged / 0 left / 1 right, uses_enemies)
+        self.enemy_count = 0
+        self.nav = None
+        self.steps = {
+            FollowPlayerAI: self.follow,
+            GuardPositionAI: self.guard,
+            PatrolAI: self.patrol,
+            AggressiveAI: self.aggressive,
+            FleeAI: self.flee,
+            WanderAI: self.wander,
+        }
+
+    def prepare(self, entities, player, enemies, nav=None):
+        """算出所有可批次處理的單位本幀的轉向"""
+        self.results = {}
+        self.enemy_count = len(enemies)
+        self.nav = nav
+        groups = {}
+        for entity in entities:
+            behavior = active_behavior(entity.ai)
+            step = self.steps.get(type(behavior))
+            if step:
+                groups.setdefault(step, []).append(behavior)
+        for step, behaviors in groups.items():
+            step(behaviors, player, enemies)
+
+    def apply(self, entity, enemies):
+        """套用預先算好的結果；沒有可用的結果時回傳 False（呼叫端改跑逐一 AI）"""
+        result = self.results.pop(entity, None)
+        if result is None:
+            return False
+        vx, vy, facing, uses_enemies = result
+        if uses_enemies and len(enemies) != self.enemy_count:
+            return False
+        entity.vel.update(vx, vy)
+        if facing >= 0:
+            entity.facing_right = facing == 1
+        return True
+
+    def pack(self, behaviors):
+        """(實體, x, y, vx, vy, speed) 陣列"""
+        entities = [b.entity for b in behaviors]
+        x = np.array([e.pos.x for e in entities])
+        y = np.array([e.pos.y for e in entities])
+        vx = np.array([e.vel.x for e in entities])
+        vy = np.array([e.vel.y for e in entities])
+        speed = np.array([e.speed for e in entities], dtype=float)
+        return entities, x, y, vx, vy, speed
+
+    def store(self, entities, vx, vy, facing, uses_enemies=False):
+        results = self.results
+        for entity, rvx, rvy, rfacing in zip(entities, vx.tolist(), vy.tolist(), facing.tolist()):
+            results[entity] = (rvx, rvy, rfacing, uses_enemies)
+
+    def steer(self, vx, vy, facing, mask, dx, dy, dist, speed, factor=None, turn=True):
+        """mask 內的實體朝 (dx, dy) 方向加速 diff.normalize() * speed * factor；turn 時朝向跟著改變"""
+        nx = dx[mask] / dist[mask]
+        ny = dy[mask] / dist[mask]
+        ax = nx * speed[mask]
+        ay = ny * speed[mask]
+        if factor is not None:
+            # Same association order as the Vector2 code, so results match bit for bit
+            ax *= factor
+            ay *= factor
+        vx[mask] += ax
+        vy[mask] += ay
+        if turn:
+            facing[mask] = nx > 0
+
+    def follow(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        follow_distance = np.array([b.follow_distance for b in behaviors], dtype=float)
+        stop_distance = np.array([b.stop_distance for b in behaviors], dtype=float)
+        facing = np.full(len(entities), -1)
+        dx = player.pos.x - x
+        dy = player.pos.y - y
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        far = dist > follow_distance
+        near = ~far & (dist < stop_distance)
+        idle = ~far & ~near
+        chase_batch(self.nav, x, y, [player] * len(entities), dx, dy, dist, far)
+        self.steer(vx, vy, facing, far, dx, dy, dist, speed)
+        self.steer(vx, vy, facing, near, dx, dy, dist, -(speed * 0.3), turn=False)  # Back off a little
+        vx[idle] *= 0.9
+        vy[idle] *= 0.9
+        self.store(entities, vx, vy, facing)
+
+    def guard(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        facing = np.full(len(entities), -1)
+        gx = np.array([b.guard_pos.x for b in behaviors])
+        gy = np.array([b.guard_pos.y for b in behaviors])
+        dx = gx - x
+        dy = gy - y
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        away = dist > 10
+        route_batch(self.nav, x, y, gx, gy, dx, dy, dist, away)
+        self.steer(vx, vy, facing, away, dx, dy, dist, speed, 0.5, turn=False)
+        vx[~away] *= 0.8
+        vy[~away] *= 0.8
+        self.store(entities, vx, vy, facing)
+
+    def patrol(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        facing = np.full(len(entities), -1)
+        waiting = np.array([b.wait_timer > 0 for b in behaviors])
+        offset = np.array([b.target_offset for b in behaviors], dtype=float)
+        gx = np.array([b.start_pos.x for b in behaviors]) + offset
+        gy = np.array([b.start_pos.y for b in behaviors])
+        dx = gx - x
+        dy = gy - y
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        vx[waiting] *= 0.9
+        vy[waiting] *= 0.9
+        arrived = ~waiting & (dist < 20)
+        route_batch(self.nav, x, y, gx, gy, dx, dy, dist, ~waiting & ~arrived)
+        self.steer(vx, vy, facing, ~waiting & ~arrived, dx, dy, dist, speed, 0.5)
+        for i in np.flatnonzero(waiting).tolist():
+            behaviors[i].wait_timer -= 1
+        for i in np.flatnonzero(arrived).tolist():
+            behavior = behaviors[i]
+            behavior.target_offset *= -1
+            behavior.wait_timer = behavior.wait_duration
+            facing[i] = behavior.target_offset > 0
+        self.store(entities, vx, vy, facing)
+
+    def aggressive(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        facing = np.full(len(entities), -1)
+        if not self.enemy_count:
+            # No enemies: follow the player
+            dx = player.pos.x - x
+            dy = player.pos.y - y
+            dist = np.sqrt(dx * dx + dy * dy)
+            far = dist > 100
+            chase_batch(self.nav, x, y, [player] * len(entities), dx, dy, dist, far)
+            self.steer(vx, vy, facing, far, dx, dy, dist, speed, 0.5, turn=False)
+            self.store(entities, vx, vy, facing, uses_enemies=True)
+            return
+
+        # Nearest enemy of every entity, from one distance matrix
+        targets = enemies.sprites()
+        ex = np.array([e.pos.x for e in targets])
+        ey = np.array([e.pos.y for e in targets])
+        dxm = ex - x[:, None]
+        dym = ey - y[:, None]
+        d2m = dxm * dxm + dym * dym
+        rows = np.arange(len(entities))
+        closest = d2m.argmin(axis=1)
+        dx = dxm[rows, closest]
+        dy = dym[rows, closest]
+        d2 = d2m[rows, closest]
+        dist = np.sqrt(d2)
+
+        chase_range = np.array([b.chase_range for b in behaviors], dtype=float)
+        attack_range = np.array([b.attack_range for b in behaviors], dtype=float)
+        found = (d2 <= chase_range * chase_range) & (dist < chase_range)
+        chase = found & (dist > attack_range)
+        self.steer(vx, vy, facing, chase, dx, dy, dist, speed)
+        # In attack range: keep a little distance
+        self.steer(vx, vy, facing, found & ~chase, dx, dy, dist, speed, 0.3)
+        self.store(entities, vx, vy, facing, uses_enemies=True)
+
+    def flee(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        facing = np.full(len(entities), -1)
+        flee_distance = np.array([b.flee_distance for b in behaviors], dtype=float)
+        if self.nav and self.nav.influence.active:
+            # Down the threat map's danger gradient
+            away, dx, dy = self.nav.influence.escape_batch(x, y, flee_distance)
+            dist = np.sqrt(dx * dx + dy * dy)
+            self.steer(vx, vy, facing, away, dx, dy, dist, speed, 1.5)
+        elif self.enemy_count:
+            # Same accumulation order as FleeAI.update
+            danger_center = pygame.math.Vector2(0, 0)
+            for enemy in enemies:
+                danger_center += enemy.pos
+            danger_center /= len(enemies)
+            dx = x - danger_center.x
+            dy = y - danger_center.y
+            dist = np.sqrt(dx * dx + dy * dy)
+            self.steer(vx, vy, facing, dist < flee_distance, dx, dy, dist, speed, 1.5)
+        self.store(entities, vx, vy, facing, uses_enemies=True)
+
+    def wander(self, behaviors, player, enemies):
+        entities, x, y, vx, vy, speed = self.pack(behaviors)
+        facing = np.full(len(entities), -1)
+        waiting = np.array([b.wait_timer > 0 for b in behaviors])
+        gx = np.array([b.target.x for b in behaviors])
+        gy = np.array([b.target.y for b in behaviors])
+        dx = gx - x
+        dy = gy - y
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        vx[waiting] *= 0.95
+        vy[waiting] *= 0.95
+        arrived = ~waiting & (dist < 30)
+        route_batch(self.nav, x, y, gx, gy, dx, dy, dist, ~waiting & ~arrived)
+        self.steer(vx, vy, facing, ~waiting & ~arrived, dx, dy, dist, speed, 0.3)
+        for i in np.flatnonzero(waiting).tolist():
+            behaviors[i].wait_timer -= 1
+        # New targets are drawn in group order, like the per-unit updates
+        for i in np.flatnonzero(arrived).tolist():
+            behavior = behaviors[i]
+            behavior.target = behavior.get_random_target()
+            behavior.wait_timer = rng.stream("wander").randint(30, 120)
+        self.store(entities, vx, vy, facing)
 
 # AI 類型對照表 - 方便從字串創建 AI
 AI_TYPES = {
@@ -0,0 +1,134 @@
+# assets.py
+"""
+資源管理
+圖片依路徑只讀取、轉換一次並快取；快取有記憶體上限，超過時淘汰最久沒用到的圖 (LRU)
+preload() 在背景執行緒先讀取並解碼清單中的圖片（主選單顯示期間），
+convert_alpha 需要視窗與主執行緒，所以延到第一次取用時才做
+"""
+import glob
+import json
+import os
+import threading
+from collections import OrderedDict
+import pygame
+from settings import ASSET_BUDGET, ASSET_MANIFEST
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+def default_manifest():
+    """預載清單：settings.ASSET_MANIFEST 加上 data/ 內單位設定檔引用的圖片"""
+    paths = [os.path.join(ROOT, path) for path in ASSET_MANIFEST]
+    for unit_file in sorted(glob.glob(os.path.join(ROOT, 'data', '*.json'))):
+        try:
+            with open(unit_file, encoding='utf-8') as f:
+                image = json.load(f).get("image")
+        except (OSError, ValueError, AttributeError):
+            continue
+        if image:
+            paths.append(os.path.join(ROOT, 'assets', image))
+    return paths
+
+class AssetManager:
+    """以路徑為鍵的圖片快取（LRU，上限 budget bytes）"""
+    def __init__(self, budget=ASSET_BUDGET):
+        self.budget = budget
+        self.images = OrderedDict()  # path -> converted Surface, least recently used first
+        self.used_bytes = 0
+        self.decoded = {}            # path -> Surface decoded by the preload thread, not converted yet
+        self.lock = threading.Lock()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.listeners = []          # Called with the key of every image evicted or invalidated
+
+    def subscribe(self, callback):
+        """callback(key) 會在圖片被淘汰或作廢時呼叫（讓由它產生的圖一起丟棄）"""
+        self.listeners.append(callback)
+
+    def released(self, key):
+        for callback in self.listeners:
+            callback(key)
+
+    def key(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def image(self, path):
+        """取得圖片；不存在時丟出 FileNotFoundError"""
+        key = self.key(path)
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        with self.lock:
+            image = self.decoded.pop(key, None)
+        if image is None:
+            image = pygame.image.load(key)
+        # Converting needs a display (skipped in headless mode)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        self.store(key, image)
+        return image
+
+    def store(self, key, image):
+        self.images[key] = image
+        self.used_bytes += surface_bytes(image)
+        # Evict least recently used images, but always keep the one just stored
+        while self.used_bytes > self.budget and len(self.images) > 1:
+            old_key, old = self.images.popitem(last=False)
+            self.used_bytes -= surface_bytes(old)
+            self.evictions += 1
+            self.released(old_key)
+
+    def invalidate(self, path):
+        """丟棄 path 的快取（檔案內容被覆寫後呼叫，下次取用時重新讀取）"""
+        key = self.key(path)
+        image = self.images.pop(key, None)
+        if image is not None:
+            self.used_bytes -= surface_bytes(image)
+        with self.lock:
+            self.decoded.pop(key, None)
+        self.released(key)
+
+    def preload(self, paths=None):
+        """在背景執行緒讀取並解碼圖片"""
+        if self.thread and self.thread.is_alive():
+            return
+        paths = default_manifest() if paths is None else list(paths)
+        self.thread = threading.Thread(target=self.load_decoded, args=(paths,), daemon=True)
+        self.thread.start()
+
+    def load_decoded(self, paths):
+        for path in paths:
+            key = self.key(path)
+            if key in self.images or key in self.decoded:
+                continue
+            try:
+                image = pygame.image.load(key)
+            except (FileNotFoundError, pygame.error):
+                continue
+            with self.lock:
+                if key not in self.images:
+                    self.decoded[key] = image
+
+    def wait(self):
+        """等待背景預載完成"""
+        if self.thread:
+            self.thread.join()
+
+manager = AssetManager()
+
+def image(path):
+    return manager.image(path)
+
+def invalidate(path):
+    manager.invalidate(path)
+
+def preload(paths=None):
+    manager.preload(paths)
@@ -0,0 +1,79 @@
+# background.py
+"""
+靜態世界背景圖層
+地板、網格與地平線只畫一次，依區塊 (chunk) 快取成 Surface，每幀只 blit 與鏡頭可見範圍重疊的區塊
+世界設定（大小、地平線、顏色）改變時才重新繪製
+"""
+import pygame
+import settings
+
+class WorldBackground:
+    """以區塊快取的世界背景"""
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.BACKGROUND_CHUNK_SIZE
+        self.chunks = {}  # (cx, cy) -> Surface
+        self.key = None
+
+    def settings_key(self):
+        return (settings.WORLD_WIDTH, settings.WORLD_HEIGHT, settings.GROUND_HORIZON,
+                settings.COLOR_BG, settings.COLOR_GROUND)
+
+    def invalidate(self):
+        self.chunks.clear()
+
+    def render_chunk(self, cx, cy):
+        """繪製一個區塊（座標為世界座標減去區塊原點）"""
+        size = self.chunk_size
+        ox, oy = cx * size, cy * size
+        width = min(size, settings.WORLD_WIDTH - ox)
+        height = min(size, settings.WORLD_HEIGHT - oy)
+        chunk = pygame.Surface((width, height))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        chunk.fill(settings.COLOR_BG)
+
+        # Floor
+        floor_rect = pygame.Rect(0, settings.GROUND_HORIZON, settings.WORLD_WIDTH,
+                                 settings.WORLD_HEIGHT - settings.GROUND_HORIZON)
+        pygame.draw.rect(chunk, settings.COLOR_GROUND, floor_rect.move(-ox, -oy))
+
+        # Grid (Subtle Runic Feel - Darker)
+        grid_size = 100
+        for x in range(0, settings.WORLD_WIDTH, grid_size):
+            if ox <= x < ox + width:
+                pygame.draw.line(chunk, (20, 20, 25), (x - ox, -oy), (x - ox, settings.WORLD_HEIGHT - oy))
+        for y in range(0, settings.WORLD_HEIGHT, grid_size):
+            if oy <= y < oy + height:
+                pygame.draw.line(chunk, (20, 20, 25), (-ox, y - oy), (settings.WORLD_WIDTH - ox, y - oy))
+
+        # Horizon Line
+        horizon = settings.GROUND_HORIZON - oy
+        pygame.draw.line(chunk, (50, 0, 50), (-ox, horizon), (settings.WORLD_WIDTH - ox, horizon), 2)
+        return chunk
+
+    def draw(self, surface, camera_offset):
+        """畫出鏡頭範圍內的背景；camera_offset 為 camera.topleft"""
+        key = self.settings_key()
+        if key != self.key:
+            self.invalidate()
+            self.key = key
+
+        view = surface.get_rect()
+        world_on_screen = pygame.Rect(camera_offset, (settings.WORLD_WIDTH, settings.WORLD_HEIGHT))
+        if not world_on_screen.contains(view):
+            surface.fill(settings.COLOR_BG)
+
+        # Visible part of the world, in world coordinates
+        visible = view.move(-camera_offset[0], -camera_offset[1]).clip(
+            pygame.Rect(0, 0, settings.WORLD_WIDTH, settings.WORLD_HEIGHT))
+        if not visible.width or not visible.height:
+            return
+        size = self.chunk_size
+        blits = []
+        for cy in range(visible.top // size, (visible.bottom - 1) // size + 1):
+            for cx in range(visible.left // size, (visible.right - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    chunk = self.chunks[(cx, cy)] = self.render_chunk(cx, cy)
+                blits.append((chunk, (cx * size + camera_offset[0], cy * size + camera_offset[1])))
+        surface.blits(blits, False)
@@ -0,0 +1,83 @@
+# collision.py
+"""
+碰撞粗篩 (broadphase)
+每個 group_a（飛彈）以 Rect.collidelistall 在 C 裡一次測試所有 group_b（敵人）的 rect，取代逐一 spritecollide；
+飛彈很多時 group_b 先依 rect 左緣排序一次，每個飛彈只以二分搜尋找出 x 區間可能重疊的那一段來測試
+敵人擠在同一個 x 範圍時也不會退化成 Python 裡的兩兩比對，任一群組是空的時直接回傳
+"""
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+SORT_MIN = 64  # Fewer a sprites than this: testing every b in C is cheaper than sorting b
+
+class Broadphase:
+    """a 對 b 的 rect 重疊測試（a 很多時排序 + 二分搜尋，只測試 x 區間可能重疊的 b）"""
+    def __init__(self):
+        # Last frame
+        self.pairs_tested = 0
+        self.pairs_skipped = 0
+        self.candidates = 0
+        # Running totals
+        self.total_tested = 0
+        self.total_skipped = 0
+        self.total_candidates = 0
+
+    def record(self, tested, skipped, candidates):
+        self.pairs_tested = tested
+        self.pairs_skipped = skipped
+        self.candidates = candidates
+        self.total_tested += tested
+        self.total_skipped += skipped
+        self.total_candidates += candidates
+
+    def find_pairs(self, group_a, group_b):
+        """
+        回傳 [(a, [b, ...]), ...]，只包含 rect 重疊的組合
+        a 依 group_a 的順序、b 依 group_b 的順序排列（與逐一 spritecollide 的結果一致）
+        """
+        if not group_a or not group_b:
+            self.record(0, 0, 0)
+            return []
+        a_list = group_a.sprites()
+        b_list = group_b.sprites()
+        if len(a_list) < SORT_MIN:
+            return self.test_all(a_list, b_list)
+
+        # b sorted by left edge: (left, index, rect)
+        boxes = sorted([(s.rect.left, i, s.rect) for i, s in enumerate(b_list)], key=itemgetter(0))
+        lefts = [box[0] for box in boxes]
+        order = [box[1] for box in boxes]
+        rects = [box[2] for box in boxes]
+        widest = max(rect.width for rect in rects)
+
+        pairs = []
+        tested = 0
+        candidates = 0
+        for a in a_list:
+            rect = a.rect
+            # Overlap needs b.left < a.right and b.right > a.left, i.e. b.left > a.left - widest
+            start = bisect_right(lefts, rect.left - widest)
+            end = bisect_left(lefts, rect.right)
+            if start >= end:
+                continue
+            tested += end - start
+            hits = rect.collidelistall(rects[start:end])
+            if hits:
+                candidates += len(hits)
+                pairs.append((a, [b_list[j] for j in sorted(order[start + k] for k in hits)]))
+
+        self.record(tested, len(a_list) * len(b_list) - tested, candidates)
+        return pairs
+
+    def test_all(self, a_list, b_list):
+        """每個 a 對所有 b 做一次 collidelistall（結果已依 b 的順序排列）"""
+        rects = [s.rect for s in b_list]
+        pairs = []
+        candidates = 0
+        for a in a_list:
+            hits = a.rect.collidelistall(rects)
+            if hits:
+                candidates += len(hits)
+                pairs.append((a, [b_list[j] for j in hits]))
+        self.record(len(a_list) * len(b_list), 0, candidates)
+        return pairs
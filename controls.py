@@ -0,0 +1,55 @@
+# controls.py
+"""
+輸入來源
+LiveInput 直接讀取 pygame；ScriptedInput 用預先排好的按鍵、事件與指令驅動遊戲（無視窗模擬、錄影回放用）
+poll() 回傳 (events, keys, commands)，commands 為直接交給 Game.apply_command 的遊戲指令
+"""
+from collections import deque
+import pygame
+
+class KeyState:
+    """模擬 pygame.key.get_pressed() 的按鍵狀態"""
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class LiveInput:
+    """從 pygame 讀取即時輸入"""
+    def poll(self):
+        return pygame.event.get(), pygame.key.get_pressed(), []
+
+class ScriptedInput:
+    """腳本化輸入 - 每次 poll 取出一幀的按鍵、事件與指令，用完後保持閒置"""
+    def __init__(self, frames=None):
+        self.frames = deque()
+        self.idle = KeyState()
+        for frame in frames or []:
+            self.push(frame.get("keys", ()), frame.get("events", ()), frame.get("commands", ()))
+
+    @property
+    def finished(self):
+        return not self.frames
+
+    def push(self, keys=(), events=(), commands=()):
+        """排入一幀輸入"""
+        self.frames.append((list(events), KeyState(keys), [tuple(c) for c in commands]))
+
+    def hold(self, keys, frames):
+        """連續按住按鍵 frames 幀"""
+        for _ in range(frames):
+            self.push(keys)
+
+    def key_press(self, key):
+        """排入一次按鍵按下事件"""
+        self.push(events=[pygame.event.Event(pygame.KEYDOWN, key=key)])
+
+    def click(self, pos, button=1):
+        """排入一次滑鼠點擊（螢幕座標）"""
+        self.push(events=[pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=pos)])
+
+    def poll(self):
+        if self.frames:
+            return self.frames.popleft()
+        return [], self.idle, []
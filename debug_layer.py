@@ -0,0 +1,142 @@
+# debug_layer.py
+"""
+除錯範圍圖層
+半透明的攻擊範圍圓每種 (半徑, 顏色) 只預先畫一次，所有範圍圓以單次批次 blit 畫出；
+偵測 / 脫離範圍的兩個同心 1px 外框每種 (偵測半徑, 脫離半徑) 也只畫一次，存成 colorkey + RLE 加速的不透明圖
+（blit 時直接跳過透明的部分，比每個敵人兩次 draw.circle 快一倍），和攻擊範圍一起批次 blit
+按 F4 切換顯示內容：關閉 → 敵人攻擊範圍 → 加上偵測 / 脫離範圍、召喚單位攻擊範圍與障礙（導航碰撞資料）
+→ 威脅影響圖熱度圖（紅：敵人的 danger 圖層，藍：玩家與召喚物的 summons 圖層）
+影響圖每格一個像素畫在小圖上，圖層有變動時才重畫，只把畫面內的部分放大貼上
+"""
+import numpy as np
+import pygame
+
+# Range kinds shown by each F4 step
+MODES = [
+    (),
+    ("attack",),
+    ("attack", "detection", "unit", "obstacles"),
+    ("influence", "obstacles"),
+]
+
+ENEMY_ATTACK_COLOR = (255, 0, 0, 50)
+DETECTION_COLOR = (120, 100, 20)
+LOSE_TARGET_COLOR = (90, 50, 20)
+UNIT_ATTACK_COLOR = (0, 160, 255, 45)
+OBSTACLE_COLOR = (200, 60, 200)
+INFLUENCE_ALPHA = 150 # Opacity of the hottest influence cell
+
+class DebugLayer:
+    """快取的除錯範圍圓與批次繪製"""
+    def __init__(self, enabled=False):
+        self.circles = {}  # (radius, color) -> Surface
+        self.rings = {}    # (detection range, lose-target range) -> colorkeyed outlines Surface
+        self.mode = 1 if enabled else 0
+        self.heatmap = None          # One pixel per influence map cell
+        self.heatmap_version = None
+
+    @property
+    def kinds(self):
+        return MODES[self.mode]
+
+    def toggle(self):
+        self.mode = (self.mode + 1) % len(MODES)
+
+    def circle(self, radius, color):
+        key = (radius, color)
+        surface = self.circles.get(key)
+        if surface is None:
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            self.circles[key] = surface
+        return surface
+
+    def range_rings(self, detection, lose):
+        """偵測 / 脫離範圍的同心外框（中心在圖的正中央）"""
+        key = (detection, lose)
+        surface = self.rings.get(key)
+        if surface is None:
+            radius = max(detection, lose)
+            surface = pygame.Surface((radius * 2, radius * 2))
+            surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            pygame.draw.circle(surface, LOSE_TARGET_COLOR, (radius, radius), lose, 1)
+            pygame.draw.circle(surface, DETECTION_COLOR, (radius, radius), detection, 1)
+            self.rings[key] = surface
+        return surface
+
+    def render_heatmap(self, influence):
+        """影響圖變動時重畫小熱度圖"""
+        if self.heatmap is not None and self.heatmap_version == influence.version:
+            return self.heatmap
+        # Each layer scaled to its own peak (pixel arrays are indexed [x, y])
+        danger = influence.danger.T * 255 // max(int(influence.danger.max()), 1)
+        summons = influence.summons.T * 255 // max(int(influence.summons.max()), 1)
+        heatmap = pygame.Surface((influence.cols, influence.rows), pygame.SRCALPHA)
+        rgb = pygame.surfarray.pixels3d(heatmap)
+        rgb[..., 0] = danger
+        rgb[..., 1] = summons // 2
+        rgb[..., 2] = summons
+        del rgb
+        alpha = pygame.surfarray.pixels_alpha(heatmap)
+        alpha[...] = np.maximum(danger, summons) * INFLUENCE_ALPHA // 255
+        del alpha
+        self.heatmap = heatmap
+        self.heatmap_version = influence.version
+        return heatmap
+
+    def draw_influence(self, surface, influence, ox, oy):
+        """只把畫面內的影響圖格子放大貼上"""
+        heatmap = self.render_heatmap(influence)
+        size = influence.cell_size
+        screen_w, screen_h = surface.get_size()
+        x0, y0 = max(-ox // size, 0), max(-oy // size, 0)
+        x1 = min((screen_w - ox) // size + 1, influence.cols)
+        y1 = min((screen_h - oy) // size + 1, influence.rows)
+        if x1 <= x0 or y1 <= y0:
+            return
+        area = heatmap.subsurface((x0, y0, x1 - x0, y1 - y0))
+        scaled = pygame.transform.scale(area, ((x1 - x0) * size, (y1 - y0) * size))
+        surface.blit(scaled, (x0 * size + ox, y0 * size + oy))
+
+    def draw(self, surface, enemies, units, camera_offset, nav=None):
+        """畫出目前模式的範圍；回傳畫出的圓數"""
+        kinds = self.kinds
+        if not kinds:
+            return 0
+        ox, oy = camera_offset
+        if nav and "influence" in kinds:
+            self.draw_influence(surface, nav.influence, ox, oy)
+        screen_w, screen_h = surface.get_size()
+        blits = []
+
+        def on_screen(x, y, radius):
+            return x + radius > 0 and y + radius > 0 and x - radius < screen_w and y - radius < screen_h
+
+        def add(radius, color, center):
+            x, y = center[0] + ox, center[1] + oy
+            if on_screen(x, y, radius):
+                blits.append((self.circle(radius, color), (x - radius, y - radius)))
+
+        for enemy in enemies:
+            if "detection" in kinds:
+                # Target checks measure from the ground position
+                x, y = int(enemy.pos.x) + ox, int(enemy.pos.y) + oy
+                radius = max(enemy.detection_range, enemy.lose_target_range)
+                if on_screen(x, y, radius):
+                    rings = self.range_rings(enemy.detection_range, enemy.lose_target_range)
+                    blits.append((rings, (x - radius, y - radius)))
+            if "attack" in kinds:
+                add(enemy.attack_range, ENEMY_ATTACK_COLOR, enemy.rect.center)
+        if "unit" in kinds:
+            for unit in units:
+                add(unit.attack_range, UNIT_ATTACK_COLOR, unit.rect.center)
+
+        if nav and "obstacles" in kinds:
+            for rect in nav.grid.rects:
+                pygame.draw.rect(surface, OBSTACLE_COLOR, rect.move(ox, oy), 2)
+
+        if hasattr(surface, "fblits"):
+            surface.fblits(blits)
+        else:
+            surface.blits(blits, False)
+        return len(blits)
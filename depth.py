@@ -0,0 +1,47 @@
+# depth.py
+"""
+繪製深度排序
+DepthGroup 是會保留繪製順序（依 pos.y 由後到前）的 sprite 群組：順序串列跨幀保存，
+每幀只需修補上一幀以來的些微變動，不必重建串列再完整排序
+sprite 以類別屬性 render_kind 標示繪製種類（player / unit / enemy / loot / projectile），不必每幀查詢所屬群組
+"""
+from operator import attrgetter
+import pygame
+
+depth_key = attrgetter("pos.y")
+COMPACT_MIN = 64  # Removals tolerated before compacting even when nothing draws (headless runs)
+
+class DepthGroup(pygame.sprite.Group):
+    """依 pos.y 維持繪製順序的 sprite 群組"""
+    def __init__(self, *sprites):
+        self.order = []    # Back to front; new sprites are appended and sorted in on the next repair
+        self.removed = 0   # Sprites removed since the last compaction (still in self.order)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.order.append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.removed += 1
+        # Without a draw calling repair() the dead entries would pile up: compact once they
+        # outnumber the members, which keeps the cost amortized O(1) per removal
+        if self.removed > max(COMPACT_MIN, len(self.spritedict)):
+            self.compact()
+
+    def compact(self):
+        """從繪製順序中移除已離開群組的 sprite"""
+        # dict.fromkeys drops the duplicate left by a sprite removed and re-added in between
+        members = self.spritedict
+        self.order = [sprite for sprite in dict.fromkeys(self.order) if sprite in members]
+        self.removed = 0
+
+    def repair(self):
+        """修補並回傳繪製順序"""
+        if self.removed:
+            self.compact()
+        # The list is almost sorted from last frame: Timsort finds the sorted runs and only
+        # moves the sprites that crossed a neighbour, i.e. an insertion-sort repair done in C
+        self.order.sort(key=depth_key)
+        return self.order
@@ -4,11 +4,56 @@
 包含基礎敵人類別和不同類型的敵人
 """
 import pygame
-import random
 from settings import *
+import sprite_cache
+from spatial import within
+from navigation import route, chase
+from enemy_brain import STATES, STATE_CODES, PATROL, CHASE, PREPARE_ATTACK, ATTACK_COOLDOWN, ATTACK, HURT
+
+def draw_enemy(enemy_type):
+    """創建敵人圖像（程式化繪製）"""
+    size = 40
+    image = pygame.Surface((size, size), pygame.SRCALPHA)
+    
+    if enemy_type == "skeleton":
+        # 骷髏 - 灰白色
+        # Body
+        pygame.draw.rect(image, (200, 200, 200), (15, 20, 10, 15))
+        # Head
+        pygame.draw.rect(image, (220, 220, 220), (12, 10, 16, 12))
+        # Eyes
+        pygame.draw.circle(image, (255, 0, 0), (17, 15), 2)
+        pygame.draw.circle(image, (255, 0, 0), (23, 15), 2)
+        # Arms
+        pygame.draw.rect(image, (180, 180, 180), (10, 22, 5, 10))
+        pygame.draw.rect(image, (180, 180, 180), (25, 22, 5, 10))
+        # Weapon (sword)
+        pygame.draw.rect(image, (150, 150, 150), (30, 18, 8, 2))
+        
+    elif enemy_type == "goblin":
+        # 哥布林 - 綠色
+        # Body
+        pygame.draw.ellipse(image, (80, 120, 60), (12, 18, 16, 18))
+        # Head
+        pygame.draw.circle(image, (90, 130, 70), (20, 15), 8)
+        # Eyes
+        pygame.draw.circle(image, (255, 255, 0), (17, 14), 2)
+        pygame.draw.circle(image, (255, 255, 0), (23, 14), 2)
+        # Ears
+        pygame.draw.polygon(image, (70, 110, 50), [(12, 12), (8, 8), (12, 16)])
+        pygame.draw.polygon(image, (70, 110, 50), [(28, 12), (32, 8), (28, 16)])
+    return image
+
+sprite_cache.register_template("enemy.skeleton", lambda: draw_enemy("skeleton"))
+sprite_cache.register_template("enemy.goblin", lambda: draw_enemy("goblin"))
 
 class Enemy(pygame.sprite.Sprite):
     """基礎敵人類別"""
+    # Shadow is always on the ground (y), not affected by z - centered at feet
+    shadow = (30, 10, 100)
+    shadow_offset = (0, 0)
+    render_kind = "enemy"
+    
     def __init__(self, x, y, enemy_type="skeleton"):
         super().__init__()
         self.pos = pygame.math.Vector2(x, y)
@@ -49,39 +94,10 @@ class Enemy(pygame.sprite.Sprite):
         self.death_timer = 0
         
     def create_image(self):
-        """創建敵人圖像（程式化繪製）"""
-        size = 40
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        if self.enemy_type == "skeleton":
-            # 骷髏 - 灰白色
-            # Body
-            pygame.draw.rect(self.image, (200, 200, 200), (15, 20, 10, 15))
-            # Head
-            pygame.draw.rect(self.image, (220, 220, 220), (12, 10, 16, 12))
-            # Eyes
-            pygame.draw.circle(self.image, (255, 0, 0), (17, 15), 2)
-            pygame.draw.circle(self.image, (255, 0, 0), (23, 15), 2)
-            # Arms
-            pygame.draw.rect(self.image, (180, 180, 180), (10, 22, 5, 10))
-            pygame.draw.rect(self.image, (180, 180, 180), (25, 22, 5, 10))
-            # Weapon (sword)
-            pygame.draw.rect(self.image, (150, 150, 150), (30, 18, 8, 2))
+        """取得敵人圖像（每種敵人只程式化繪製一次，所有實例共用）"""
+        self.image = sprite_cache.get("enemy." + self.enemy_type)
             
-        elif self.enemy_type == "goblin":
-            # 哥布林 - 綠色
-            # Body
-            pygame.draw.ellipse(self.image, (80, 120, 60), (12, 18, 16, 18))
-            # Head
-            pygame.draw.circle(self.image, (90, 130, 70), (20, 15), 8)
-            # Eyes
-            pygame.draw.circle(self.image, (255, 255, 0), (17, 14), 2)
-            pygame.draw.circle(self.image, (255, 255, 0), (23, 14), 2)
-            # Ears
-            pygame.draw.polygon(self.image, (70, 110, 50), [(12, 12), (8, 8), (12, 16)])
-            pygame.draw.polygon(self.image, (70, 110, 50), [(28, 12), (32, 8), (28, 16)])
-            
-    def update(self, physics, player, units):
+    def update(self, physics, player, units, brain=None, nav=None):
         """更新敵人狀態"""
         if self.state == "dead":
             self.death_timer += 1
@@ -95,8 +111,9 @@ class Enemy(pygame.sprite.Sprite):
         if self.hurt_timer > 0:
             self.hurt_timer -= 1
         
-        # AI Logic
-        self.ai_update(player, units)
+        # AI Logic (already decided by the batched EnemyBrain when apply() succeeds)
+        if not (brain and brain.apply(self)):
+            self.ai_update(player, units, nav)
         
         # Physics
         physics.apply_gravity(self)
@@ -111,14 +128,13 @@ class Enemy(pygame.sprite.Sprite):
         elif self.vel.x < 0:
             self.facing_right = False
     
-    def ai_update(self, player, units):
-        """AI 行為邏輯"""
-        # Check for targets (player        # Find closest target (weighted by threat)
-        potential_targets = [player] + units
-        closest_target = None
+    def score_targets(self, targets):
+        """回傳 (分數, 目標, 距離)，分數 = 距離 / 威脅，越低越優先"""
         best_score = float('inf')
+        closest_target = None
+        closest_dist = None
         
-        for target in potential_targets:
+        for target in targets:
             if hasattr(target, 'hp') and target.hp > 0:
                 dist = self.pos.distance_to(target.pos)
                 threat = getattr(target, 'threat', 1)
@@ -129,83 +145,114 @@ class Enemy(pygame.sprite.Sprite):
                     best_score = score
                     closest_target = target
                     closest_dist = dist
+        return best_score, closest_target, closest_dist
+    
+    def find_target(self, player, units, nav=None):
+        """找出威脅加權後最優先的目標（玩家或召喚物），回傳 (目標, 距離)"""
+        if nav and nav.influence.active:
+            # Look up the threat peak around us instead of scoring every target in range
+            return nav.influence.pick_target(self, player, units)
+        # Only targets inside detection range can start a chase, so search there first
+        best_score, target, dist = self.score_targets([player] + within(units, self.pos, self.detection_range))
+        if target is None or dist >= self.detection_range:
+            return None, None
         
-        # State Machine
-        if self.state == "patrol":
-            # Patrol between two points
-            if self.pos.distance_to(self.patrol_target) < 10:
-                # Switch patrol target
-                if self.patrol_target == self.patrol_point_a:
-                    self.patrol_target = self.patrol_point_b
-                else:
-                    self.patrol_target = self.patrol_point_a
-            
-            # Move towards patrol target
-            direction = (self.patrol_target - self.pos).normalize() if self.pos.distance_to(self.patrol_target) > 0 else pygame.math.Vector2(0, 0)
-            self.vel = direction * self.speed * 0.5  # Slower when patrolling
-            
-            # Check for targets in range
-            if closest_target and closest_dist < self.detection_range:
-                self.state = "chase"
-                self.target = closest_target
+        # A farther unit can still out-score it (score = dist / threat),
+        # but only if it is closer than best_score * THREAT_MAX
+        search_radius = best_score * THREAT_MAX
+        if search_radius > self.detection_range:
+            best_score, target, dist = self.score_targets([player] + within(units, self.pos, search_radius))
+        return target, dist
+    
+    def ai_update(self, player, units, nav=None):
+        """AI 行為邏輯（狀態機：狀態編譯成整數代碼，查表呼叫對應的處理函式）"""
+        code = STATE_CODES.get(self.state)
+        handler = STATE_HANDLERS[code] if code is not None else None
+        if handler:
+            handler(self, player, units, nav)
+    
+    def ai_patrol(self, player, units, nav=None):
+        # Patrol between two points
+        if self.pos.distance_to(self.patrol_target) < 10:
+            # Switch patrol target
+            if self.patrol_target == self.patrol_point_a:
+                self.patrol_target = self.patrol_point_b
+            else:
+                self.patrol_target = self.patrol_point_a
         
-        elif self.state == "chase":
-            if not self.target or not hasattr(self.target, 'hp') or self.target.hp <= 0:
-                self.state = "patrol"
-                self.target = None
-                return
-            
-            dist_to_target = self.pos.distance_to(self.target.pos)
-            
-            # Lost target
-            if dist_to_target > self.lose_target_range:
-                self.state = "patrol"
-                self.target = None
-                return
-            
-            # In attack range
-            if dist_to_target < self.attack_range:
-                if self.attack_timer == 0:
-                    self.state = "prepare_attack"
-                    self.vz = 5  # Jump
-                    self.is_grounded = False
-                    self.vel = pygame.math.Vector2(0, 0) # Stop moving while jumping
-                else:
-                    self.state = "attack_cooldown" # Wait for cooldown
-                    self.vel = pygame.math.Vector2(0, 0)
-                return
-            
-            # Chase target (Omnidirectional)
-            direction = (self.target.pos - self.pos).normalize()
-            self.vel = direction * self.speed
+        # Move towards patrol target (around obstacles via the shared path cache)
+        if self.pos.distance_to(self.patrol_target) > 0:
+            direction = route(nav, self.pos, self.patrol_target, self.patrol_target - self.pos).normalize()
+        else:
+            direction = pygame.math.Vector2(0, 0)
+        self.vel = direction * self.speed * 0.5  # Slower when patrolling
+        
+        # Check for targets in range (player or units, weighted by threat)
+        closest_target, closest_dist = self.find_target(player, units, nav)
+        if closest_target and closest_dist < self.detection_range:
+            self.state = "chase"
+            self.target = closest_target
+    
+    def ai_chase(self, player, units, nav=None):
+        if not self.target or not hasattr(self.target, 'hp') or self.target.hp <= 0:
+            self.state = "patrol"
+            self.target = None
+            return
+        
+        dist_to_target = self.pos.distance_to(self.target.pos)
         
-        elif self.state == "prepare_attack":
-            # Wait until grounded
-            if self.z <= 0 and self.vz <= 0: # Landed
-                self.perform_attack()
-                self.state = "attack_cooldown"
-                self.attack_timer = self.attack_cooldown
+        # Lost target
+        if dist_to_target > self.lose_target_range:
+            self.state = "patrol"
+            self.target = None
+            return
         
-        elif self.state == "attack_cooldown":
+        # In attack range
+        if dist_to_target < self.attack_range:
             if self.attack_timer == 0:
-                self.state = "chase"
+                self.start_attack()
             else:
-                # Face target while waiting
-                if self.target:
-                    if self.target.pos.x > self.pos.x:
-                        self.facing_right = True
-                    else:
-                        self.facing_right = False
+                self.state = "attack_cooldown" # Wait for cooldown
+                self.vel = pygame.math.Vector2(0, 0)
+            return
         
-        elif self.state == "attack":
-            # Legacy state, redirect to chase
+        # Chase target (Omnidirectional), detouring around obstacles
+        direction = chase(nav, self.pos, self.target, self.target.pos - self.pos).normalize()
+        self.vel = direction * self.speed
+    
+    def start_attack(self):
+        self.state = "prepare_attack"
+        self.vz = 5  # Jump
+        self.is_grounded = False
+        self.vel = pygame.math.Vector2(0, 0) # Stop moving while jumping
+    
+    def ai_prepare_attack(self, player, units, nav=None):
+        # Wait until grounded
+        if self.z <= 0 and self.vz <= 0: # Landed
+            self.perform_attack()
+            self.state = "attack_cooldown"
+            self.attack_timer = self.attack_cooldown
+    
+    def ai_attack_cooldown(self, player, units, nav=None):
+        if self.attack_timer == 0:
             self.state = "chase"
-        
-        elif self.state == "hurt":
-            # Knockback effect
-            self.vel *= 0.9
-            if self.hurt_timer == 0:
-                self.state = "chase" if self.target else "patrol"
+        else:
+            # Face target while waiting
+            if self.target:
+                if self.target.pos.x > self.pos.x:
+                    self.facing_right = True
+                else:
+                    self.facing_right = False
+    
+    def ai_attack(self, player, units, nav=None):
+        # Legacy state, redirect to chase
+        self.state = "chase"
+    
+    def ai_hurt(self, player, units, nav=None):
+        # Knockback effect
+        self.vel *= 0.9
+        if self.hurt_timer == 0:
+            self.state = "chase" if self.target else "patrol"
     
     def perform_attack(self):
         """執行攻擊"""
@@ -231,37 +278,6 @@ class Enemy(pygame.sprite.Sprite):
                 knockback_dir = (self.pos - self.target.pos).normalize()
                 self.vel = knockback_dir * 3
     
-    def draw_shadow(self, surface, cam_offset):
-        """繪製陰影"""
-        # Shadow is always on the ground (y), not affected by z
-        shadow_x = int(self.pos.x + cam_offset[0])
-        shadow_y = int(self.pos.y + cam_offset[1])
-        
-        # Draw shadow centered at feet
-        shadow_rect = pygame.Rect(0, 0, 30, 10)
-        shadow_rect.center = (shadow_x, shadow_y)
-        
-        s = pygame.Surface((30, 10), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 100), (0, 0, 30, 10))
-        surface.blit(s, shadow_rect)
-        
-        # Debug: Draw attack range
-        # self.draw_attack_range(surface, cam_offset)
-
-    def draw_attack_range(self, surface, cam_offset):
-        """繪製攻擊範圍（除錯用）"""
-        range_surf = pygame.Surface((self.attack_range * 2, self.attack_range * 2), pygame.SRCALPHA)
-        pygame.draw.circle(range_surf, (255, 0, 0, 50), (self.attack_range, self.attack_range), self.attack_range)
-        
-        # Use rect center which is already updated with position and z-height
-        # rect.center is in world coordinates (but projected to 2D)
-        # We need to subtract camera offset
-        
-        screen_center_x = self.rect.centerx + cam_offset[0]
-        screen_center_y = self.rect.centery + cam_offset[1]
-        
-        surface.blit(range_surf, (screen_center_x - self.attack_range, screen_center_y - self.attack_range))
-
     def draw_hp_bar(self, surface, cam_offset):
         """繪製生命條"""
         if self.hp >= self.max_hp:
@@ -286,6 +302,16 @@ class Enemy(pygame.sprite.Sprite):
         pygame.draw.rect(surface, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 1)
 
 
+# State code -> handler (dead enemies are handled in update())
+STATE_HANDLERS = [None] * len(STATES)
+STATE_HANDLERS[PATROL] = Enemy.ai_patrol
+STATE_HANDLERS[CHASE] = Enemy.ai_chase
+STATE_HANDLERS[PREPARE_ATTACK] = Enemy.ai_prepare_attack
+STATE_HANDLERS[ATTACK_COOLDOWN] = Enemy.ai_attack_cooldown
+STATE_HANDLERS[ATTACK] = Enemy.ai_attack
+STATE_HANDLERS[HURT] = Enemy.ai_hurt
+
+
 class Skeleton(Enemy):
     """骷髏戰士 - 基礎近戰敵人"""
     def __init__(self, x, y):
@@ -0,0 +1,174 @@
+# enemy_brain.py
+"""
+敵人 AI 狀態機
+狀態字串編譯成整數代碼，Enemy.ai_update 以代碼查表呼叫處理函式
+EnemyBrain 每幀先把敵人依狀態分組，巡邏與追擊兩個最常見的狀態以 NumPy 一次判斷整組的轉換
+（偵測、威脅加權選目標、脫離、進入攻擊範圍）與移動；追擊被障礙擋住時沿流場或 A* 路徑繞路；其他狀態照常逐一執行
+結果在敵人輪到時才套用：選定的目標若在這之前被打倒，改跑原本的逐一邏輯
+"""
+import numpy as np
+import pygame
+from navigation import route_batch, chase_batch
+
+STATES = ("patrol", "chase", "prepare_attack", "attack_cooldown", "attack", "hurt", "dead")
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+PATROL, CHASE, PREPARE_ATTACK, ATTACK_COOLDOWN, ATTACK, HURT, DEAD = range(len(STATES))
+
+# Chase outcomes
+LOST, IN_RANGE, MOVE = range(3)
+
+# Smaller groups cost less one by one than packing the arrays (patrol packs every unit as a target)
+MIN_GROUP = 16
+
+def is_alive(target):
+    return bool(target) and hasattr(target, 'hp') and target.hp > 0
+
+class EnemyBrain:
+    """批次敵人 AI：依狀態分組，以陣列運算判斷狀態轉換"""
+    def __init__(self):
+        self.results = {}  # enemy -> (state code, ...)
+        self.nav = None
+        # State code -> bulk evaluation / per-enemy application
+        self.evaluators = {PATROL: self.patrol, CHASE: self.chase}
+        self.appliers = {PATROL: self.apply_patrol, CHASE: self.apply_chase}
+
+    def prepare(self, enemies, player, units, nav=None):
+        """依狀態分組並批次算出巡邏 / 追擊中的敵人本幀的決定"""
+        self.results = {}
+        self.nav = nav
+        groups = {}
+        for enemy in enemies:
+            code = STATE_CODES.get(enemy.state)
+            if code in self.evaluators:
+                groups.setdefault(code, []).append(enemy)
+        for code, members in groups.items():
+            if len(members) >= MIN_GROUP:
+                self.evaluators[code](members, player, units)
+
+    def apply(self, enemy):
+        """套用預先算好的決定；沒有可用的結果時回傳 False（呼叫端改跑 ai_update）"""
+        result = self.results.pop(enemy, None)
+        if result is None or STATE_CODES.get(enemy.state) != result[0]:
+            return False
+        return self.appliers[result[0]](enemy, result)
+
+    def patrol(self, enemies, player, units):
+        x = np.array([e.pos.x for e in enemies])
+        y = np.array([e.pos.y for e in enemies])
+        speed = np.array([e.speed for e in enemies], dtype=float)
+        detection = np.array([e.detection_range for e in enemies], dtype=float)
+        # Current and next patrol point
+        on_a = [e.patrol_target == e.patrol_point_a for e in enemies]
+        current = [e.patrol_point_a if a else e.patrol_point_b for e, a in zip(enemies, on_a)]
+        other = [e.patrol_point_b if a else e.patrol_point_a for e, a in zip(enemies, on_a)]
+        px = np.array([p.x for p in current])
+        py = np.array([p.y for p in current])
+
+        dx = x - px
+        dy = y - py
+        switch = np.sqrt(dx * dx + dy * dy) < 10
+        px[switch] = [other[i].x for i in np.flatnonzero(switch)]
+        py[switch] = [other[i].y for i in np.flatnonzero(switch)]
+
+        # Move towards the patrol point, slower than chasing (around obstacles via the shared path cache)
+        dx = px - x
+        dy = py - y
+        dist = np.sqrt(dx * dx + dy * dy)
+        moving = dist > 0
+        route_batch(self.nav, x, y, px, py, dx, dy, dist, moving)
+        vx = np.zeros(len(enemies))
+        vy = np.zeros(len(enemies))
+        vx[moving] = dx[moving] / dist[moving] * speed[moving] * 0.5
+        vy[moving] = dy[moving] / dist[moving] * speed[moving] * 0.5
+
+        if self.nav and self.nav.influence.active:
+            # Threat map peaks: the same lookup as Enemy.find_target, for the whole group at once
+            chosen = self.nav.influence.pick_targets(enemies, x, y, player, units)
+            targets = []
+        else:
+            # Threat-weighted target choice: lowest dist / threat over the player and every live unit.
+            # find_target's two searches reach the same winner, since no unit has more than THREAT_MAX threat
+            chosen = [None] * len(enemies)
+            targets = [target for target in [player, *units] if is_alive(target)]
+        if targets:
+            tx = np.array([t.pos.x for t in targets])
+            ty = np.array([t.pos.y for t in targets])
+            threat = np.array([max(getattr(t, 'threat', 1), 1) for t in targets], dtype=float)
+            dxm = x[:, None] - tx
+            dym = y[:, None] - ty
+            dm = np.sqrt(dxm * dxm + dym * dym)
+            best = (dm / threat).argmin(axis=1)
+            found = dm[np.arange(len(enemies)), best] < detection
+            for i in np.flatnonzero(found).tolist():
+                chosen[i] = targets[best[i]]
+
+        results = self.results
+        for enemy, s, rvx, rvy, target in zip(enemies, switch.tolist(), vx.tolist(), vy.tolist(), chosen):
+            results[enemy] = (PATROL, s, rvx, rvy, target)
+
+    def apply_patrol(self, enemy, result):
+        _, switch, vx, vy, target = result
+        # A target knocked out earlier this frame may change the choice
+        if target is not None and target.hp <= 0:
+            return False
+        if switch:
+            if enemy.patrol_target == enemy.patrol_point_a:
+                enemy.patrol_target = enemy.patrol_point_b
+            else:
+                enemy.patrol_target = enemy.patrol_point_a
+        enemy.vel = pygame.math.Vector2(vx, vy)
+        if target is not None:
+            enemy.state = "chase"
+            enemy.target = target
+        return True
+
+    def chase(self, enemies, player, units):
+        alive = [is_alive(e.target) for e in enemies]
+        results = self.results
+        chasing = [e for e, a in zip(enemies, alive) if a]
+        for enemy, a in zip(enemies, alive):
+            if not a:
+                results[enemy] = (CHASE, LOST, 0.0, 0.0, False)
+        if not chasing:
+            return
+
+        x = np.array([e.pos.x for e in chasing])
+        y = np.array([e.pos.y for e in chasing])
+        dx = np.array([e.target.pos.x for e in chasing]) - x
+        dy = np.array([e.target.pos.y for e in chasing]) - y
+        dist = np.sqrt(dx * dx + dy * dy)
+        speed = np.array([e.speed for e in chasing], dtype=float)
+        lose = np.array([e.lose_target_range for e in chasing], dtype=float)
+        attack = np.array([e.attack_range for e in chasing], dtype=float)
+
+        outcome = np.full(len(chasing), MOVE)
+        outcome[dist < attack] = IN_RANGE
+        outcome[dist > lose] = LOST
+        moving = outcome == MOVE
+        # Chasers cut off from their target detour around the obstacles (same lookup as Enemy.ai_chase)
+        chase_batch(self.nav, x, y, [e.target for e in chasing], dx, dy, dist, moving)
+        vx = np.zeros(len(chasing))
+        vy = np.zeros(len(chasing))
+        vx[moving] = dx[moving] / dist[moving] * speed[moving]
+        vy[moving] = dy[moving] / dist[moving] * speed[moving]
+
+        for enemy, o, rvx, rvy in zip(chasing, outcome.tolist(), vx.tolist(), vy.tolist()):
+            results[enemy] = (CHASE, o, rvx, rvy, True)
+
+    def apply_chase(self, enemy, result):
+        _, outcome, vx, vy, alive = result
+        if alive != is_alive(enemy.target):
+            return False
+        if outcome == LOST:
+            enemy.state = "patrol"
+            enemy.target = None
+        elif outcome == IN_RANGE:
+            # attack_timer was already counted down this frame
+            if enemy.attack_timer == 0:
+                enemy.start_attack()
+            else:
+                enemy.state = "attack_cooldown" # Wait for cooldown
+                enemy.vel = pygame.math.Vector2(0, 0)
+        else:
+            enemy.vel = pygame.math.Vector2(vx, vy)
+        return True
@@ -0,0 +1,140 @@
+# flowfield.py
+"""
+流場 (flow field)
+把世界切成粗網格，每個被追擊的目標格（玩家或一群召喚物所在的格子）各有一張流場：
+從目標格做一次 Dijkstra，每格記錄往目標格的下一步方向，以及能否直線看到目標格
+追擊同一格目標的整群敵人（與跟隨玩家的召喚物）共用同一張流場，每個實體每幀只查自己所在的格子 O(1)
+流場只和障礙有關：目標在格子內移動不必重算，換格時改查（或排隊建立）那一格的流場；
+新的流場每幀最多建立 FLOW_BUDGET 張（先到先建），已建立的以 LRU 快取，地圖改變時全部作廢
+沒有障礙時每格都能直線看到目標，直線追擊本身就是 O(1) 而且精確，所以不建立任何流場
+"""
+import heapq
+import math
+from collections import OrderedDict
+import numpy as np
+from settings import *
+
+SQRT2 = math.sqrt(2)
+NEIGHBOURS = [(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+              (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2)]
+
+class FlowField:
+    """往單一目標格的流場"""
+    def __init__(self, fields, goal):
+        self.goal = goal
+        self.cols = cols = fields.cols
+        rows = fields.rows
+        gx, gy = goal
+        # Dijkstra from the goal over the shared neighbour table
+        cost = [math.inf] * (cols * rows)
+        parent_dx = [0.0] * (cols * rows)
+        parent_dy = [0.0] * (cols * rows)
+        start = gy * cols + gx
+        links = fields.links
+        if goal not in fields.blocked:
+            cost[start] = 0.0
+            heap = [(0.0, start)]
+            while heap:
+                c, index = heapq.heappop(heap)
+                if c > cost[index]:
+                    continue
+                for other, dx, dy, step in links[index]:
+                    nc = c + step
+                    if nc < cost[other]:
+                        cost[other] = nc
+                        # Each cell steps back towards the cell it was reached from
+                        parent_dx[other] = -dx / step
+                        parent_dy[other] = -dy / step
+                        heapq.heappush(heap, (nc, other))
+        # Per cell (flat, cy * cols + cx): the detour step, or None where the goal is in a
+        # straight line, unreachable or the goal cell itself. Plain lists: looked up once per chaser per frame
+        visible = fields.sees(goal).ravel().tolist()
+        self.steps = [None if seen or c == math.inf or not (dx or dy) else (dx, dy)
+                      for seen, c, dx, dy in zip(visible, cost, parent_dx, parent_dy)]
+
+    def step(self, cx, cy):
+        """(cx, cy) 格的繞路方向 (dx, dy)；能直線看到目標格（或到不了）時回傳 None"""
+        return self.steps[cy * self.cols + cx]
+
+class FlowFields:
+    """以目標格為鍵共用的流場快取與每幀建立預算"""
+    def __init__(self, cell_size=FLOW_CELL_SIZE, width=WORLD_WIDTH, height=WORLD_HEIGHT,
+                 budget=FLOW_BUDGET, capacity=FLOW_CACHE_SIZE):
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.budget = budget
+        self.capacity = capacity
+        self.fields = OrderedDict()  # goal cell -> FlowField, least recently used first
+        self.pending = {}            # goal cell -> frame requested
+        self.frame = 0
+        self.builds = 0
+        self.set_blocked(())
+
+    def cell_of(self, x, y):
+        cx = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return cx, cy
+
+    def passable(self, cx, cy):
+        return 0 <= cx < self.cols and 0 <= cy < self.rows and (cx, cy) not in self.blocked
+
+    def moves(self, cx, cy):
+        passable = self.passable
+        for dx, dy, step in NEIGHBOURS:
+            if not passable(cx + dx, cy + dy):
+                continue
+            if dx and dy and not (passable(cx + dx, cy) and passable(cx, cy + dy)):
+                continue
+            yield dx, dy, step
+
+    def set_blocked(self, cells):
+        """更換障礙格（地圖改變）：所有流場作廢"""
+        self.blocked = set(cells)
+        self.fields.clear()
+        self.pending.clear()
+        self.blocked_mask = np.zeros((self.rows, self.cols), dtype=bool)
+        for cx, cy in self.blocked:
+            self.blocked_mask[cy, cx] = True
+        # Neighbour table (8 directions, no cutting blocked corners), indexed cy * cols + cx
+        cols = self.cols
+        self.links = [[((cy + dy) * cols + cx + dx, dx, dy, step) for dx, dy, step in self.moves(cx, cy)]
+                      for cy in range(self.rows) for cx in range(cols)]
+
+    def sees(self, goal):
+        """每格中心到 goal 格中心的直線（以半格為間距取樣）是否沒有障礙"""
+        bx, by = goal
+        cy, cx = np.mgrid[0:self.rows, 0:self.cols]
+        steps = np.maximum(abs(bx - cx), abs(by - cy)) * 2
+        longest = int(steps.max())
+        if longest < 2:
+            return np.ones((self.rows, self.cols), dtype=bool)
+        # One row per sample i = 1 .. longest - 1; samples past a cell's own step count are ignored
+        i = np.arange(1, longest)[:, None, None]
+        t = i / np.maximum(steps, 1)
+        px = (cx + 0.5 + (bx - cx) * t).astype(int)
+        py = (cy + 0.5 + (by - cy) * t).astype(int)
+        hit = self.blocked_mask[np.clip(py, 0, self.rows - 1), np.clip(px, 0, self.cols - 1)] & (i < steps)
+        return ~hit.any(axis=0)
+
+    def begin_frame(self):
+        """建立排隊中最早的 budget 張流場"""
+        self.frame += 1
+        if not self.pending:
+            return
+        # Oldest requests first, ties by goal: the same requests give the same fields in any order
+        for goal, _ in heapq.nsmallest(self.budget, self.pending.items(), key=lambda item: (item[1], item[0])):
+            del self.pending[goal]
+            self.fields[goal] = FlowField(self, goal)
+            self.builds += 1
+            if len(self.fields) > self.capacity:
+                self.fields.popitem(last=False)
+
+    def field(self, goal):
+        """goal 格的流場；還沒建立時排隊並回傳 None"""
+        field = self.fields.get(goal)
+        if field is None:
+            self.pending.setdefault(goal, self.frame)
+            return None
+        self.fields.move_to_end(goal)
+        return field
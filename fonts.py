@@ -0,0 +1,84 @@
+# fonts.py
+"""
+字型與文字快取
+get_font() 每種 (字型, 大小, 粗體) 只建立一次 SysFont（掃描系統字型很慢）
+render() 以 (font, text, color) 為鍵快取算繪好的文字 Surface，超過上限時淘汰最久沒用到的 (LRU)
+GlyphAtlas 為每個字元只算繪一次，快速變動的數字（HUD 數值、效能數據）以逐字 blit 組成
+"""
+from collections import OrderedDict
+import pygame
+from settings import TEXT_CACHE_SIZE
+
+fonts = {}
+
+def get_font(name="Arial", size=18, bold=False):
+    key = (name, size, bold)
+    font = fonts.get(key)
+    if font is None:
+        font = fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+class TextCache:
+    """(font, text, color) -> 算繪好的文字 Surface（LRU）"""
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, True, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+text_cache = TextCache()
+
+def render(font, text, color):
+    return text_cache.render(font, text, color)
+
+class GlyphAtlas:
+    """單一字型與顏色的字元圖集（預先算繪數字與常用符號，其他字元第一次用到時加入）"""
+    def __init__(self, font, color, chars="0123456789./:-% "):
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+        for char in chars:
+            self.glyph(char)
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.font.render(char, True, self.color)
+        return glyph
+
+    def width(self, text):
+        glyph = self.glyph
+        return sum(glyph(char).get_width() for char in text)
+
+    def draw(self, surface, text, pos):
+        """逐字畫出 text，回傳畫出的寬度"""
+        x, y = pos
+        blits = []
+        for char in text:
+            glyph = self.glyph(char)
+            blits.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(blits, False)
+        return x - pos[0]
+
+atlases = {}
+
+def atlas(font, color):
+    key = (font, color)
+    glyphs = atlases.get(key)
+    if glyphs is None:
+        glyphs = atlases[key] = GlyphAtlas(font, color)
+    return glyphs
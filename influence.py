@@ -0,0 +1,284 @@
+# influence.py
+"""
+威脅影響圖 (influence map)
+世界切成粗網格，每個實體把「威脅值 × 隨距離遞減的權重」蓋印到圖層上：
+玩家與召喚物蓋在 summons 圖層（敵人找獵物用），敵人蓋在 danger 圖層（召喚物逃跑用）
+每幀以 bincount 統計每格的威脅總和，只在總和有變動（有實體換格、死亡、離開）的格子補蓋差額；
+圖層是整數，增量更新不會累積誤差，變動的格子很多時改用整張捲積重算（結果相同）
+敵人選目標改為查偵測範圍內的局部最大值：整格都在範圍內的峰值格，其首選目標每幀只找一次，所有看到同一個峰值的敵人共用，
+那裡沒有可用目標時改看範圍外緣的峰值格；每格的目標在 update 時分好，不必掃描範圍內所有目標
+逃跑改為沿 danger 圖層的梯度往下走
+settings.TARGETING = "influence" 時由 AI 使用；F4 除錯圖層可顯示熱度圖（影響半徑等參數可直接調整）
+"""
+import math
+from itertools import chain
+import numpy as np
+import pygame
+from numpy.lib.stride_tricks import sliding_window_view
+from settings import *
+
+MISSING = object()
+FULL_REBUILD_CELLS = 48 # More changed cells than this: one vectorized convolution beats stamping them one by one
+
+class InfluenceMap:
+    """增量更新的威脅影響圖"""
+    def __init__(self, cell_size=INFLUENCE_CELL_SIZE, radius=INFLUENCE_RADIUS,
+                 width=WORLD_WIDTH, height=WORLD_HEIGHT):
+        self.cell_size = cell_size
+        self.radius = radius  # Stamp radius in cells
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.active = False   # Drives enemy targeting / fleeing (TARGETING = "influence")
+        self.visible = False  # Shown by the debug layer
+        r = radius
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+        # Linear falloff: radius + 1 at the centre, 0 outside the radius
+        self.weight = np.maximum(0, r + 1 - np.rint(np.hypot(dx, dy))).astype(np.int32)
+        self.windows = {}     # (detection range, part) -> footprint cells, see window()
+        self.reset()
+
+    @property
+    def needed(self):
+        return self.active or self.visible
+
+    def reset(self):
+        """清空圖層；下次 update 時所有實體重新蓋印"""
+        self.summons = np.zeros((self.rows, self.cols), dtype=np.int32)
+        self.danger = np.zeros((self.rows, self.cols), dtype=np.int32)
+        # Threat total of each cell the layers were last stamped with
+        self.totals = {"summons": np.zeros_like(self.summons), "danger": np.zeros_like(self.danger)}
+        self.stamped = False
+        self.members = {}     # cell (cy * cols + cx) -> live player / summons in it at the last update
+        self.peak_cache = {}  # (detection range, part) -> (padded layer, peak_x, peak_y), -2 = not looked up yet
+        self.peak_targets = {}  # peak cell -> best target there (or None)
+        self.gradient = None
+        self.restamps = 0     # Cells restamped by the last update
+        self.version = 0
+
+    def cell_of(self, x, y):
+        cx = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return cx, cy
+
+    def center(self, cx, cy):
+        return pygame.math.Vector2((cx + 0.5) * self.cell_size, (cy + 0.5) * self.cell_size)
+
+    def cell_totals(self, entities, members=None):
+        """每格存活實體的威脅總和；給 members 字典時順便記下每格（cy * cols + cx）有哪些實體"""
+        live = [e for e in entities if e.hp > 0]
+        if not live:
+            return np.zeros((self.rows, self.cols), dtype=np.int32)
+        size = self.cell_size
+        cx = np.clip(np.array([e.pos.x for e in live]) // size, 0, self.cols - 1).astype(int)
+        cy = np.clip(np.array([e.pos.y for e in live]) // size, 0, self.rows - 1).astype(int)
+        cells = cy * self.cols + cx
+        if members is not None:
+            for index, entity in zip(cells.tolist(), live):
+                members.setdefault(index, []).append(entity)
+        threat = [max(getattr(e, 'threat', 1), 1) for e in live]
+        totals = np.bincount(cells, threat, self.rows * self.cols)
+        return totals.astype(np.int32).reshape(self.rows, self.cols)
+
+    def stamp(self, layer, cx, cy, amount):
+        r = self.radius
+        x0, y0 = max(cx - r, 0), max(cy - r, 0)
+        x1, y1 = min(cx + r + 1, self.cols), min(cy + r + 1, self.rows)
+        layer[y0:y1, x0:x1] += self.weight[y0 - cy + r:y1 - cy + r, x0 - cx + r:x1 - cx + r] * amount
+
+    def spread(self, totals):
+        """整張重算：威脅總和與權重的捲積"""
+        r = self.radius
+        windows = sliding_window_view(np.pad(totals, r), self.weight.shape)
+        return np.einsum('ijkl,kl->ij', windows, self.weight).astype(np.int32)
+
+    def update(self, player, units, enemies):
+        """依位置變化增量更新兩個圖層"""
+        changed_cells = 0
+        self.members = {}
+        for name, layer, entities, members in (("summons", self.summons, chain([player], units), self.members),
+                                               ("danger", self.danger, enemies, None)):
+            totals = self.cell_totals(entities, members)
+            delta = totals - self.totals[name]
+            changed = np.flatnonzero(delta)
+            if len(changed) > FULL_REBUILD_CELLS:
+                layer[...] = self.spread(totals)
+            else:
+                for index in changed.tolist():
+                    cy, cx = divmod(index, self.cols)
+                    self.stamp(layer, cx, cy, int(delta[cy, cx]))
+            self.totals[name] = totals
+            changed_cells += len(changed)
+        self.stamped = True
+        self.restamps = changed_cells
+        self.peak_targets = {}  # Targets move every frame even when the totals do not
+        if changed_cells:
+            self.peak_cache = {}
+            self.gradient = None
+            self.version += 1
+
+    def footprint(self, detection_range):
+        """
+        偵測範圍涵蓋的 (2r+1) x (2r+1) 格，分成兩個遮罩：
+        inner 是從所在格的任何位置到格子內的任何位置都在範圍內的格子（峰值格裡的目標一定在範圍內），
+        rim 是其餘有一部分在範圍內的格子
+        """
+        reach = detection_range / self.cell_size
+        r = math.ceil(reach)
+        dy, dx = np.abs(np.mgrid[-r:r + 1, -r:r + 1])
+        inner = (dx + 1) ** 2 + (dy + 1) ** 2 <= reach * reach
+        rim = ~inner & (np.maximum(dx - 1, 0) ** 2 + np.maximum(dy - 1, 0) ** 2 < reach * reach)
+        return inner, rim
+
+    def window(self, detection_range, part):
+        """footprint 遮罩（part 0 = inner，1 = rim）裡的格子：(半徑 r, dx, dy, 在填充 r 格的圖層上的平移量)"""
+        key = (detection_range, part)
+        found = self.windows.get(key)
+        if found is None:
+            mask = self.footprint(detection_range)[part]
+            r = mask.shape[0] // 2
+            dy, dx = np.nonzero(mask)
+            found = (r, dx - r, dy - r, dy * (self.cols + 2 * r) + dx)
+            self.windows[key] = found
+        return found
+
+    def peaks(self, detection_range, part, cx, cy):
+        """
+        (cx, cy) 陣列每一格的 footprint 內有目標的格子裡 summons 圖層最大值所在的格，回傳 (peak_x, peak_y)；
+        沒有這樣的格子時為 -1。只算被查到的格子，每幀每格最多一次（同分取第一個，單一與批次版本結果相同）
+        """
+        key = (detection_range, part)
+        found = self.peak_cache.get(key)
+        r, dx, dy, offsets = self.window(detection_range, part)
+        if found is None:
+            # Only cells holding a target can be a peak: the falloff around a cluster just outside has none
+            values = np.pad(np.where(self.totals["summons"] > 0, self.summons, 0), r).ravel()
+            # A range under one cell diagonal has no inner cells: nothing to look up
+            unknown = np.full((self.rows, self.cols), -2 if len(offsets) else -1)
+            found = (values, unknown, unknown.copy())
+            self.peak_cache[key] = found
+        values, peak_x, peak_y = found
+        todo = peak_x[cy, cx] == -2
+        if todo.any():
+            cells = np.unique(cy[todo] * self.cols + cx[todo])
+            qy, qx = np.divmod(cells, self.cols)
+            # Cell (qx, qy) is the top-left corner of its window on the padded layer
+            candidates = values[(qy * (self.cols + 2 * r) + qx)[:, None] + offsets]
+            best = candidates.argmax(axis=1)
+            empty = candidates[np.arange(len(cells)), best] <= 0
+            peak_x[qy, qx] = np.where(empty, -1, qx + dx[best])
+            peak_y[qy, qx] = np.where(empty, -1, qy + dy[best])
+        return peak_x[cy, cx], peak_y[cy, cx]
+
+    def peak_target(self, px, py):
+        """峰值格裡最優先的目標（離格子中心的距離 / 威脅最低）"""
+        key = (px, py)
+        target = self.peak_targets.get(key, MISSING)
+        if target is MISSING or (target is not None and target.hp <= 0):
+            center = self.center(px, py)
+            best_score = math.inf
+            target = None
+            for candidate in self.members.get(py * self.cols + px, ()):
+                if candidate.hp > 0:
+                    score = center.distance_to(candidate.pos) / max(getattr(candidate, 'threat', 1), 1)
+                    if score < best_score:
+                        best_score = score
+                        target = candidate
+            self.peak_targets[key] = target
+        return target
+
+    def rim_target(self, enemy, px, py):
+        """外緣峰值格裡在偵測範圍內、離敵人的距離 / 威脅最低的目標，回傳 (目標, 距離)"""
+        best_score = math.inf
+        target, target_dist = None, None
+        for candidate in self.members.get(py * self.cols + px, ()):
+            if candidate.hp > 0:
+                dist = enemy.pos.distance_to(candidate.pos)
+                if dist < enemy.detection_range:
+                    score = dist / max(getattr(candidate, 'threat', 1), 1)
+                    if score < best_score:
+                        best_score = score
+                        target, target_dist = candidate, dist
+        return target, target_dist
+
+    def pick_target(self, enemy, player, units):
+        """
+        敵人偵測範圍內威脅最集中的格子裡最優先的目標，回傳 (目標, 距離)
+        目標完全由影響圖決定：先看整格都在範圍內的峰值格，沒有可用目標時再看外緣的峰值格，
+        距離只對這兩格裡的候選檢查，不必掃描範圍內所有目標
+        """
+        cx, cy = self.cell_of(enemy.pos.x, enemy.pos.y)
+        cx, cy = np.array([cx]), np.array([cy])
+        peak_x, peak_y = self.peaks(enemy.detection_range, 0, cx, cy)
+        px, py = int(peak_x[0]), int(peak_y[0])
+        if px >= 0:
+            target = self.peak_target(px, py)
+            if target is not None:
+                # Targets have moved since the update: confirm the candidate is still in range
+                dist = enemy.pos.distance_to(target.pos)
+                if dist < enemy.detection_range:
+                    return target, dist
+        peak_x, peak_y = self.peaks(enemy.detection_range, 1, cx, cy)
+        px, py = int(peak_x[0]), int(peak_y[0])
+        if px < 0:
+            return None, None
+        return self.rim_target(enemy, px, py)
+
+    def pick_targets(self, enemies, x, y, player, units):
+        """批次版 pick_target：每個敵人的目標（或 None），峰值查表一次處理整群，只有周圍有目標的敵人需要逐一確認"""
+        cx = np.clip(x // self.cell_size, 0, self.cols - 1).astype(int)
+        cy = np.clip(y // self.cell_size, 0, self.rows - 1).astype(int)
+        detection = np.array([e.detection_range for e in enemies], dtype=float)
+        inner_x = np.full(len(enemies), -1)
+        inner_y = np.full(len(enemies), -1)
+        rim_x = np.full(len(enemies), -1)
+        rim_y = np.full(len(enemies), -1)
+        for value in np.unique(detection).tolist():
+            group = detection == value
+            inner_x[group], inner_y[group] = self.peaks(value, 0, cx[group], cy[group])
+            rim_x[group], rim_y[group] = self.peaks(value, 1, cx[group], cy[group])
+
+        chosen = [None] * len(enemies)
+        for i in np.flatnonzero((inner_x >= 0) | (rim_x >= 0)).tolist():
+            enemy = enemies[i]
+            if inner_x[i] >= 0:
+                target = self.peak_target(int(inner_x[i]), int(inner_y[i]))
+                if target is not None and enemy.pos.distance_to(target.pos) < enemy.detection_range:
+                    chosen[i] = target
+                    continue
+            if rim_x[i] >= 0:
+                chosen[i] = self.rim_target(enemy, int(rim_x[i]), int(rim_y[i]))[0]
+        return chosen
+
+    def gradients(self):
+        if self.gradient is None:
+            gy, gx = np.gradient(self.danger.astype(float))
+            self.gradient = (gx, gy)
+        return self.gradient
+
+    def flee_threshold(self, flee_distance):
+        """
+        一個威脅 1 的敵人在 flee_distance 外蓋印的權重：danger 低於這個值時還不必逃
+        （影響半徑以外看不到，flee_distance 大於半徑時等於有任何危險就逃）
+        """
+        return np.maximum(1, self.radius + 1 - np.rint(np.asarray(flee_distance) / self.cell_size))
+
+    def escape(self, pos, flee_distance):
+        """pos 所在格沿 danger 圖層往下坡的方向 (dx, dy)；危險還不到 flee_distance 的程度（或平坦）時回傳 None"""
+        cx, cy = self.cell_of(pos.x, pos.y)
+        if self.danger[cy, cx] < self.flee_threshold(flee_distance):
+            return None
+        gx, gy = self.gradients()
+        dx, dy = -gx[cy, cx], -gy[cy, cx]
+        if not (dx or dy):
+            return None
+        return float(dx), float(dy)
+
+    def escape_batch(self, x, y, flee_distance):
+        """批次版 escape：回傳 (需要逃跑的遮罩, dx, dy) 陣列"""
+        cx = np.clip((x // self.cell_size).astype(int), 0, self.cols - 1)
+        cy = np.clip((y // self.cell_size).astype(int), 0, self.rows - 1)
+        gx, gy = self.gradients()
+        dx = -gx[cy, cx]
+        dy = -gy[cy, cx]
+        mask = (self.danger[cy, cx] >= self.flee_threshold(flee_distance)) & ((dx != 0) | (dy != 0))
+        return mask, dx, dy
@@ -1,40 +1,132 @@
 # main.py
 import pygame
+import argparse
+import os
 import sys
 import math
 import random
+import time
+import rng
 from settings import *
 from physics import Physics
 from sprites import Player, Ghoul, MagicMissile, Loot, Wisp
 from camera import Camera
+from ai import BatchAI
+from enemy_brain import EnemyBrain
+from navigation import Navigation
+import fonts
 from particles import ParticleSystem
+from background import WorldBackground
+from shadows import ShadowRenderer
+from depth import DepthGroup
+from debug_layer import DebugLayer
 from menu import show_main_menu
 from enemy import Skeleton, Goblin
 from ui import SummonUI
+from spatial import SpatialGroup
+from collision import Broadphase
+from controls import LiveInput, ScriptedInput, KeyState
+from profiler import FrameProfiler
+from replay import ReplayRecorder, load_replay
+
+FRAME_MS = 1000 / FPS  # Fixed simulation timestep
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, input_source=None, seed=None, record_path=None, ai_backend=None, targeting=None):
+        # Headless: no window, no drawing - driven by step()
+        self.headless = headless
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
         pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption(TITLE)
+        if headless:
+            self.screen = None
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption(TITLE)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Arial", 18)
+        self.font = fonts.get_font("Arial", 18)
+        
+        # Input
+        if input_source is None:
+            input_source = ScriptedInput() if headless else LiveInput()
+        self.input = input_source
+        self.keys = KeyState()
+        
+        # Seed every random stream (replays carry their own seed)
+        if seed is None:
+            seed = getattr(input_source, "seed", None)
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        self.seed = seed
+        rng.seed(seed)
+        self.recorder = ReplayRecorder(seed, record_path) if record_path else None
+        
+        # Simulation clock (advanced by FRAME_MS per update)
+        self.frame = 0
+        self.ticks = 0
         
         self.running = True
         self.physics = Physics()
+        batch_ai = (ai_backend or AI_BACKEND) == "batch"
+        self.ai_batch = BatchAI() if batch_ai else None
+        self.enemy_brain = EnemyBrain() if batch_ai else None
+        self.nav = Navigation(LEVEL_OBSTACLES)
+        self.nav.influence.active = (targeting or TARGETING) == "influence"
         self.camera = Camera(WORLD_WIDTH, WORLD_HEIGHT)
         self.particles = ParticleSystem()
+        self.background = WorldBackground()
+        self.shadows = ShadowRenderer()
+        self.debug_layer = DebugLayer(DEBUG_RANGES)
+        self.broadphase = Broadphase()
         
         self.player = Player(100, 300)
-        self.units = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.projectiles = pygame.sprite.Group()
-        self.loot = pygame.sprite.Group()
-        self.all_sprites = pygame.sprite.Group()
+        # Gameplay groups keep a spatial index of their members
+        self.units = SpatialGroup()
+        self.enemies = SpatialGroup()
+        self.projectiles = SpatialGroup()
+        self.loot = SpatialGroup()
+        self.all_sprites = DepthGroup()
         self.all_sprites.add(self.player)
         
         self.ui = SummonUI(self)
         
+        # Update pipeline, in order (name, callable) - tools may wrap these for timing
+        self.update_phases = [
+            ("player", self.update_player),
+            ("nav", self.update_nav),
+            ("units", self.update_units),
+            ("enemies", self.update_enemies),
+            ("deaths", self.update_deaths),
+            ("respawns", self.update_respawns),
+            ("projectiles", self.update_projectiles),
+            ("loot", self.update_loot),
+            ("collisions", self.update_collisions),
+            ("particles", self.update_particles),
+            ("camera", self.update_camera),
+        ]
+        self.draw_phases = [
+            ("draw.world", self.draw_world),
+            ("draw.sort", self.draw_sort),
+            ("draw.cull", self.draw_cull),
+            ("draw.shadows", self.draw_shadows),
+            ("draw.tethers", self.draw_tethers),
+            ("draw.sprites", self.draw_sprites),
+            ("draw.particles", self.draw_particles),
+            ("draw.debug", self.draw_debug),
+            ("draw.hp_bars", self.draw_hp_bars),
+            ("draw.ui", self.draw_ui),
+            ("draw.hud", self.draw_hud),
+        ]
+        self.visible = []
+        self.visible_enemies = []
+        self.render_list = []
+        self.tether_overlay = None
+        self.tether_rect = None
+        
+        # Per-phase frame timings (F3 overlay)
+        phase_names = ["events"] + [name for name, _ in self.update_phases] + [name for name, _ in self.draw_phases]
+        self.profiler = FrameProfiler(phase_names + ["draw.present"])
+        
         # Game State
         self.gold = 0
         self.target_gold = 100
@@ -58,13 +150,22 @@ class Game:
         
         self.enemies.add(enemy)
         self.all_sprites.add(enemy)
+        return enemy
+    
+    def spawn_unit(self, unit_class, x, y, **kwargs):
+        """生成召喚單位"""
+        unit = unit_class(x, y, **kwargs)
+        self.units.add(unit)
+        self.all_sprites.add(unit)
+        return unit
         
     def spawn_loot(self, x, y):
         """生成掉落物"""
         # Random loot
-        count = random.randint(1, 3)
+        rand = rng.stream("spawn_loot")
+        count = rand.randint(1, 3)
         for _ in range(count):
-            loot_type = "gold" if random.random() > 0.2 else "soul"
+            loot_type = "gold" if rand.random() > 0.2 else "soul"
             val = 10 if loot_type == "gold" else 5
             loot = Loot(x, y, loot_type, val)
             self.loot.add(loot)
@@ -73,81 +174,170 @@ class Game:
     def run(self):
         while self.running:
             self.clock.tick(FPS)
-            self.events()
+            self.profiler.measure("events", self.events)
             self.update()
             self.draw()
+            self.profiler.end_frame()
             
-    def events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            # Scripted / replayed input ends the session when exhausted
+            if getattr(self.input, "finished", False):
                 self.running = False
+        
+        if self.recorder:
+            self.recorder.save()
+    
+    def step(self, n=1):
+        """以固定時間步推進 n 幀（不讀取 pygame 輸入、不繪製），回傳實際推進的幀數"""
+        steps = 0
+        for _ in range(n):
+            if not self.running:
+                break
+            self.profiler.measure("events", self.events)
+            self.update()
+            self.profiler.end_frame()
+            steps += 1
+        return steps
             
-            # UI Events
-            self.ui.handle_event(event)
-            
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1: # Left click
-                    # Check if UI handled it? 
-                    # Ideally UI returns True if handled.
-                    # But handle_event returns None currently unless I check return value.
-                    # Let's check if mouse is in UI area?
-                    # UI is at bottom.
-                    if pygame.mouse.get_pos()[1] > SCREEN_HEIGHT - 100:
-                        continue
-                        
-                    # Convert screen pos to world pos
-                    mx, my = pygame.mouse.get_pos()
-                    cam_x, cam_y = self.camera.camera.topleft
-                    world_x = mx - cam_x
-                    world_y = my - cam_y
-                    target_pos = pygame.math.Vector2(world_x, world_y)
+    def events(self):
+        events, self.keys, commands = self.input.poll()
+        if self.recorder:
+            self.recorder.begin_frame(self.keys)
+        for event in events:
+            self.handle_event(event)
+        for command in commands:
+            self.apply_command(command)
+    
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+        
+        # UI Events
+        self.ui.handle_event(event)
+        
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1: # Left click
+                # Check if UI handled it? 
+                # Ideally UI returns True if handled.
+                # But handle_event returns None currently unless I check return value.
+                # Let's check if mouse is in UI area?
+                # UI is at bottom.
+                if event.pos[1] > SCREEN_HEIGHT - 100:
+                    return
                     
-                    # Check cooldown
-                    if self.player.attack_timer == 0:
-                        missile = MagicMissile(self.player.pos.x, self.player.pos.y - 35, target_pos)
-                        self.projectiles.add(missile)
-                        self.all_sprites.add(missile)
-                        self.player.attack_timer = 20 # Cooldown
-                        print("Fired Magic Missile!")
+                # Convert screen pos to world pos
+                mx, my = event.pos
+                cam_x, cam_y = self.camera.camera.topleft
+                world_x = mx - cam_x
+                world_y = my - cam_y
+                self.apply_command(("fire", world_x, world_y))
+        
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.apply_command(("jump",))
+            
+            if event.key == pygame.K_F3:
+                self.profiler.toggle()
+            
+            if event.key == pygame.K_F4:
+                self.debug_layer.toggle()
             
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    self.player.jump()
-                
-                if event.key == pygame.K_e:
-                    # Check exit
-                    if self.gold >= self.target_gold:
-                        if self.exit_rect.colliderect(self.player.rect):
-                            print("Level Complete!")
-                            self.running = False # End game for now (or show victory screen)
+            if event.key == pygame.K_e:
+                self.apply_command(("exit",))
+    
+    def apply_command(self, command):
+        """執行遊戲指令（所有影響模擬的輸入都經過這裡，方便錄影回放）"""
+        if self.recorder:
+            self.recorder.record_command(command)
+        
+        action = command[0]
+        if action == "fire":
+            target_pos = pygame.math.Vector2(command[1], command[2])
+            
+            # Check cooldown
+            if self.player.attack_timer == 0:
+                missile = MagicMissile(self.player.pos.x, self.player.pos.y - 35, target_pos)
+                self.projectiles.add(missile)
+                self.all_sprites.add(missile)
+                self.player.attack_timer = 20 # Cooldown
+                print("Fired Magic Missile!")
+        
+        elif action == "jump":
+            self.player.jump()
+        
+        elif action == "exit":
+            # Check exit
+            if self.gold >= self.target_gold:
+                if self.exit_rect.colliderect(self.player.rect):
+                    print("Level Complete!")
+                    self.running = False # End game for now (or show victory screen)
+        
+        elif action == "summon":
+            self.ui.summon(self.ui.unit_types[command[1]])
+        
+        elif action == "set_mode":
+            # Units are addressed by their index in the units group
+            units = self.units.sprites()
+            if command[1] < len(units):
+                unit = units[command[1]]
+                if hasattr(unit, 'ai') and hasattr(unit.ai, 'set_mode'):
+                    unit.ai.set_mode(command[2])
+                    print(f"Set unit mode to {command[2]}")
                         
     def update(self):
-        self.player.update(self.physics)
+        # Track enemies to detect death (list keeps the order deterministic)
+        self.enemies_before = self.enemies.sprites()
         
-        # Track enemies to detect death
-        enemies_before = set(self.enemies)
+        for name, phase in self.update_phases:
+            self.profiler.measure(name, phase)
         
-        # Update units (pass enemies list and game)
-        enemies_list = list(self.enemies)
+        self.frame += 1
+        self.ticks += FRAME_MS
+    
+    def update_player(self):
+        self.player.update(self.physics, self.keys)
+    
+    def update_nav(self):
+        # Queued path searches (PATH_BUDGET per frame) and flow fields (FLOW_BUDGET per frame)
+        # and the threat influence map (when the AI or the debug layer uses it)
+        nav = self.nav
+        nav.influence.visible = "influence" in self.debug_layer.kinds
+        nav.update(self.player, self.units, self.enemies)
+        self.profiler.stats["paths"] = f"{len(nav.paths.paths)} cached, {len(nav.paths.pending)} queued"
+        self.profiler.stats["flow fields"] = f"{len(nav.flow.fields)} cached, {len(nav.flow.pending)} queued"
+        if nav.influence.needed:
+            self.profiler.stats["influence restamps"] = nav.influence.restamps
+    
+    def update_units(self):
+        # Update units (pass enemies group and game)
+        # With the batch AI backend every unit's steering is computed up front, grouped by behavior
+        batch = self.ai_batch
+        if batch:
+            batch.prepare(self.units, self.player, self.enemies, self.nav)
         for unit in self.units:
-            unit.update(self.physics, self.player, enemies_list, self)
-        
-        # Update enemies (pass player and units)
-        units_list = list(self.units)
+            run_ai = not (batch and batch.apply(unit, self.enemies))
+            unit.update(self.physics, self.player, self.enemies, self, run_ai)
+    
+    def update_enemies(self):
+        # Update enemies (pass player and units group)
+        # With the batch AI backend patrol / chase decisions are evaluated for all enemies up front
+        brain = self.enemy_brain
+        if brain:
+            brain.prepare(self.enemies, self.player, self.units, self.nav)
         for enemy in self.enemies:
-            enemy.update(self.physics, self.player, units_list)
-            
+            enemy.update(self.physics, self.player, self.units, brain, self.nav)
+    
+    def update_deaths(self):
         # Detect deaths
-        enemies_after = set(self.enemies)
-        dead_enemies = enemies_before - enemies_after
+        dead_enemies = [enemy for enemy in self.enemies_before if enemy not in self.enemies]
         for enemy in dead_enemies:
             self.spawn_loot(enemy.pos.x, enemy.pos.y)
             # Queue respawn (5 seconds = 5000ms)
-            respawn_time = pygame.time.get_ticks() + 5000
+            respawn_time = self.ticks + 5000
             self.respawn_queue.append((respawn_time, enemy.pos.x, enemy.pos.y, enemy.enemy_type))
-            
+    
+    def update_respawns(self):
         # Process Respawn Queue
-        current_time = pygame.time.get_ticks()
+        current_time = self.ticks
         # Filter queue: keep items that are not yet ready
         # We need to iterate carefully to remove items
         remaining_respawns = []
@@ -159,11 +349,11 @@ class Game:
             else:
                 remaining_respawns.append(item)
         self.respawn_queue = remaining_respawns
-            
-        # Update projectiles
+    
+    def update_projectiles(self):
         self.projectiles.update()
-        
-        # Update Loot
+    
+    def update_loot(self):
         for item in self.loot:
             item.update(self.physics, self.player)
             # Collection check
@@ -177,11 +367,10 @@ class Game:
                             self.player.soul = self.player.max_soul
                 item.kill()
                 print(f"Collected {item.loot_type}! Gold: {self.gold}, Soul: {self.player.soul}")
-        
-        # Projectile collisions
-        for missile in self.projectiles:
-            # Check collision with enemies
-            hits = pygame.sprite.spritecollide(missile, self.enemies, False)
+    
+    def update_collisions(self):
+        # Projectile collisions (broadphase finds overlapping missile/enemy pairs in one sweep)
+        for missile, hits in self.broadphase.find_pairs(self.projectiles, self.enemies):
             for enemy in hits:
                 # Check Z-height (simple check)
                 if abs(enemy.z - missile.z) < 30:
@@ -190,35 +379,26 @@ class Game:
                     self.particles.emit_summon_effect(enemy.pos.x, enemy.pos.y) # Reuse effect for hit
                     break
         
+        self.profiler.stats["missile pairs tested"] = self.broadphase.pairs_tested
+        self.profiler.stats["missile pairs skipped"] = self.broadphase.pairs_skipped
+    
+    def update_particles(self):
         self.particles.update()
+        self.profiler.stats["particles"] = f"{len(self.particles)}/{self.particles.capacity}"
+    
+    def update_camera(self):
         self.camera.update(self.player)
             
     def draw(self):
-        self.screen.fill(COLOR_BG)
-        
-        # Camera Offset
-        cam_offset = self.camera.camera.topleft
+        for name, phase in self.draw_phases:
+            self.profiler.measure(name, phase)
         
-        # Draw Floor
-        floor_rect = pygame.Rect(0, GROUND_HORIZON, WORLD_WIDTH, WORLD_HEIGHT - GROUND_HORIZON)
-        pygame.draw.rect(self.screen, COLOR_GROUND, self.camera.apply_rect(floor_rect))
-        
-        # Draw Grid (Subtle Runic Feel - Darker)
-        grid_size = 100
-        for x in range(0, WORLD_WIDTH, grid_size):
-            start = self.camera.apply_pos(pygame.math.Vector2(x, 0))
-            end = self.camera.apply_pos(pygame.math.Vector2(x, WORLD_HEIGHT))
-            pygame.draw.line(self.screen, (20, 20, 25), start, end)
-            
-        for y in range(0, WORLD_HEIGHT, grid_size):
-            start = self.camera.apply_pos(pygame.math.Vector2(0, y))
-            end = self.camera.apply_pos(pygame.math.Vector2(WORLD_WIDTH, y))
-            pygame.draw.line(self.screen, (20, 20, 25), start, end)
-
-        # Draw Horizon Line
-        start = self.camera.apply_pos(pygame.math.Vector2(0, GROUND_HORIZON))
-        end = self.camera.apply_pos(pygame.math.Vector2(WORLD_WIDTH, GROUND_HORIZON))
-        pygame.draw.line(self.screen, (50, 0, 50), start, end, 2)
+        self.profiler.draw(self.screen)
+        self.profiler.measure("draw.present", pygame.display.flip)
+    
+    def draw_world(self):
+        # Floor, grid and horizon come from the cached background layer
+        self.background.draw(self.screen, self.camera.camera.topleft)
         
         # Draw Exit
         exit_screen_rect = self.camera.apply_rect(self.exit_rect)
@@ -226,71 +406,83 @@ class Game:
             # Active Exit
             pygame.draw.rect(self.screen, (0, 255, 0), exit_screen_rect, 2)
             # Draw "EXIT" text
-            text = self.font.render("EXIT (Press E)", True, (0, 255, 0))
+            text = fonts.render(self.font, "EXIT (Press E)", (0, 255, 0))
             self.screen.blit(text, (exit_screen_rect.centerx - 40, exit_screen_rect.top - 20))
         else:
             # Inactive Exit
             pygame.draw.rect(self.screen, (100, 100, 100), exit_screen_rect, 2)
-            text = self.font.render(f"Need {self.target_gold} Gold", True, (150, 150, 150))
+            text = fonts.render(self.font, f"Need {self.target_gold} Gold", (150, 150, 150))
             self.screen.blit(text, (exit_screen_rect.centerx - 50, exit_screen_rect.top - 20))
         
-        # Draw World Border
+        # Draw World Border (after the exit so it stays on top of the exit outline)
         border_rect = pygame.Rect(0, 0, WORLD_WIDTH, WORLD_HEIGHT)
         pygame.draw.rect(self.screen, (100, 0, 0), self.camera.apply_rect(border_rect), 2)
-        
-        # Draw Shadows
-        for sprite in self.all_sprites:
-            if hasattr(sprite, 'draw_shadow'):
-                sprite.draw_shadow(self.screen, cam_offset)
-        
-        # Sort sprites by Y for depth
-        sprites_list = self.all_sprites.sprites()
-        sprites_list.sort(key=lambda x: x.pos.y)
-        
-        for sprite in sprites_list:
-            # Draw Connection Line (Magic Tether)
-            # Only draw for summoned units
-            if sprite in self.units:
-                p_rect = self.camera.apply(self.player)
-                s_rect = self.camera.apply(sprite)
-                
-                start = (p_rect.centerx, p_rect.centery)
-                end = (s_rect.centerx, s_rect.centery)
-                
-                # Pulsing opacity for magic line
-                alpha = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 150 + 50
-                line_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-                pygame.draw.line(line_surf, (212, 175, 55, int(alpha)), start, end, 1)
-                self.screen.blit(line_surf, (0,0))
-            
+    
+    def draw_sort(self):
+        # Repair last frame's depth order (sprites sorted by Y)
+        self.all_sprites.repair()
+    
+    def draw_cull(self):
+        # Build the visible set once per frame; every later pass only walks these sprites
+        # The margin keeps sprites whose shadow, HP bar or range circle can still reach the screen
+        view = pygame.Rect(-self.camera.camera.x, -self.camera.camera.y, SCREEN_WIDTH, SCREEN_HEIGHT)
+        in_view = view.inflate(CULL_MARGIN * 2, CULL_MARGIN * 2).colliderect
+        # Filtering the depth-ordered list keeps the visible sprites in draw order
+        self.visible = [sprite for sprite in self.all_sprites.order if in_view(sprite.rect)]
+        self.visible_enemies = [sprite for sprite in self.visible if sprite.render_kind == "enemy"]
+        self.render_list = self.visible
+        self.profiler.stats["visible"] = len(self.visible)
+        self.profiler.stats["culled"] = len(self.all_sprites) - len(self.visible)
+    
+    def draw_shadows(self):
+        self.shadows.draw(self.screen, self.visible, self.camera.camera.topleft)
+    
+    def draw_tethers(self):
+        # Draw Connection Lines (Magic Tether) - only for summoned units
+        # Every tether goes into one reusable overlay; only the area they cover is cleared and blitted
+        overlay = self.tether_overlay
+        if overlay is None:
+            overlay = self.tether_overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        if self.tether_rect:
+            overlay.fill((0, 0, 0, 0), self.tether_rect)
+            self.tether_rect = None
+        if not self.units:
+            return
+        
+        start = self.camera.apply(self.player).center
+        # Pulsing opacity for magic line (shared by every tether this frame)
+        alpha = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 150 + 50
+        color = (212, 175, 55, int(alpha))
+        dirty = [pygame.draw.line(overlay, color, start, self.camera.apply(sprite).center, 1) for sprite in self.units]
+        rect = dirty[0].unionall(dirty[1:])
+        self.screen.blit(overlay, rect.topleft, rect)
+        self.tether_rect = rect
+    
+    def draw_sprites(self):
+        for sprite in self.render_list:
             self.screen.blit(sprite.image, self.camera.apply(sprite))
-            
+    
+    def draw_particles(self):
         # Draw Particles (Front)
-        self.particles.draw(self.screen, cam_offset)
-        
-        # Draw Attack Ranges (Visual Debug)
-        # self.player.draw_attack_range(self.screen, cam_offset) # Removed
-        for enemy in self.enemies:
-            enemy.draw_attack_range(self.screen, cam_offset)
-        
+        self.particles.draw(self.screen, self.camera.camera.topleft)
+    
+    def draw_debug(self):
+        # Debug range circles (F4 cycles what is shown, off by default)
+        self.debug_layer.draw(self.screen, self.enemies, self.units, self.camera.camera.topleft, self.nav)
+    
+    def draw_hp_bars(self):
         # Draw HP bars for enemies
-        for enemy in self.enemies:
+        cam_offset = self.camera.camera.topleft
+        for enemy in self.visible_enemies:
             enemy.draw_hp_bar(self.screen, cam_offset)
-            
-        # HUD
-        soul_text = self.font.render(f"Soul: {int(self.player.soul)}/{self.player.max_soul}", True, (200, 200, 255))
-        self.screen.blit(soul_text, (20, 20))
-        
-        gold_text = self.font.render(f"Gold: {self.gold}/{self.target_gold}", True, (255, 215, 0))
-        self.screen.blit(gold_text, (150, 20))
+    
+    def draw_hud(self):
+        # Values change often - draw them glyph by glyph from cached atlases
+        fonts.atlas(self.font, (200, 200, 255)).draw(self.screen, f"Soul: {int(self.player.soul)}/{self.player.max_soul}", (20, 20))
+        fonts.atlas(self.font, (255, 215, 0)).draw(self.screen, f"Gold: {self.gold}/{self.target_gold}", (150, 20))
         
         # Player HP bar
-        hp_text = self.font.render(f"HP: {self.player.hp}/{self.player.max_hp}", True, (255, 100, 100))
-        self.screen.blit(hp_text, (20, 45))
-        
-        # Draw UI
-        self.ui.draw(self.screen)
-        self.ui.draw_unit_portraits(self.screen)
+        fonts.atlas(self.font, (255, 100, 100)).draw(self.screen, f"HP: {self.player.hp}/{self.player.max_hp}", (20, 45))
         
         # Player HP bar (visual)
         bar_width = 200
@@ -308,22 +500,55 @@ class Game:
         # Border
         pygame.draw.rect(self.screen, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
         
-        # Controls hint
-        controls = self.font.render("WASD: Move | Space: Jump | X: Attack | 1: Summon", True, (150, 150, 150))
+        # Controls hint (debug keys on the right, clear of the summon slots in the middle)
+        controls = fonts.render(self.font, "WASD: Move | Space: Jump | X: Attack | 1: Summon", (150, 150, 150))
         self.screen.blit(controls, (20, SCREEN_HEIGHT - 30))
-        
-        pygame.display.flip()
+        debug_keys = fonts.render(self.font, "F3: Profiler | F4: Ranges", (150, 150, 150))
+        self.screen.blit(debug_keys, (SCREEN_WIDTH - 20 - debug_keys.get_width(), SCREEN_HEIGHT - 30))
+    
+    def draw_ui(self):
+        self.ui.draw(self.screen)
+        self.ui.draw_unit_portraits(self.screen)
+
+def run_headless(frames, input_source=None):
+    """無視窗模式：以最快速度推進 frames 幀（0 = 直到回放結束）並回報每秒模擬幀數"""
+    g = Game(headless=True, input_source=input_source)
+    start = time.perf_counter()
+    if frames:
+        steps = g.step(frames)
+    else:
+        steps = 0
+        while g.running and not getattr(g.input, "finished", True):
+            steps += g.step(1)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {steps} frames in {elapsed:.2f}s ({steps / max(elapsed, 1e-9):.1f} ticks/s)")
+    return g
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--headless", type=int, nargs="?", const=0, metavar="FRAMES",
+                        help="無視窗模式，模擬 FRAMES 幀（搭配 --replay 時預設跑完整段錄影）")
+    parser.add_argument("--record", metavar="PATH", help="錄下這次遊戲過程")
+    parser.add_argument("--replay", metavar="PATH", help="回放錄影檔")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    replay_input = load_replay(args.replay) if args.replay else None
+    
+    if args.headless is not None:
+        run_headless(args.headless, replay_input)
+        sys.exit()
+    
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     
-    # Show main menu
-    next_state = show_main_menu(screen)
+    # Replays skip the menu
+    next_state = "game" if replay_input else show_main_menu(screen)
     
     if next_state == "game":
         # Start game
-        g = Game()
+        g = Game(input_source=replay_input, record_path=args.record)
         g.run()
     elif next_state == "story":
         # TODO: Show story screen
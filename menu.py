@@ -5,7 +5,10 @@
 """
 import pygame
 import sys
+import assets
+import fonts
 from settings import *
+from particles import ParticleSystem
 
 class Button:
     def __init__(self, x, y, w, h, text, action):
@@ -26,7 +29,7 @@ class Button:
         pygame.draw.rect(surface, self.border_color, self.rect, 2)
         
         # 文字
-        text_surf = font.render(self.text, True, (255, 255, 255))
+        text_surf = fonts.render(font, self.text, (255, 255, 255))
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
         
@@ -40,14 +43,19 @@ class Button:
 class MainMenu:
     def __init__(self, screen):
         self.screen = screen
-        self.font_title = pygame.font.SysFont("Arial", 72, bold=True)
-        self.font_subtitle = pygame.font.SysFont("Arial", 24)
-        self.font_button = pygame.font.SysFont("Arial", 32)
+        self.font_title = fonts.get_font("Arial", 72, bold=True)
+        self.font_subtitle = fonts.get_font("Arial", 24)
+        self.font_button = fonts.get_font("Arial", 32)
+        self.font_version = fonts.get_font("Arial", 14)
         
         # 背景動畫
         self.bg_offset = 0
         self.particle_timer = 0
-        self.particles = []
+        self.particles = ParticleSystem(MENU_PARTICLE_CAPACITY, shrink=0, centered=True)
+        
+        # 背景只畫一次：漸層加直線為固定底圖，橫線畫在另一層，隨 bg_offset 捲動
+        self.backdrop = self.render_backdrop()
+        self.grid_lines = self.render_grid_lines()
         
         # 按鈕
         center_x = SCREEN_WIDTH // 2
@@ -88,6 +96,30 @@ class MainMenu:
         pygame.quit()
         sys.exit()
     
+    def render_backdrop(self):
+        """背景漸層與網格直線"""
+        backdrop = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        for y in range(SCREEN_HEIGHT):
+            ratio = y / SCREEN_HEIGHT
+            r = int(10 + ratio * 20)
+            g = int(5 + ratio * 10)
+            b = int(20 + ratio * 40)
+            pygame.draw.line(backdrop, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+        
+        # 背景網格（營造魔法陣感）
+        for x in range(0, SCREEN_WIDTH, 50):
+            pygame.draw.line(backdrop, MENU_GRID_COLOR, (x, 0), (x, SCREEN_HEIGHT), 1)
+        return backdrop
+    
+    def render_grid_lines(self):
+        """網格橫線（透明底，blit 在 y = bg_offset）"""
+        lines = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        lines.fill((0, 0, 0))
+        lines.set_colorkey((0, 0, 0))
+        for y in range(0, SCREEN_HEIGHT, 50):
+            pygame.draw.line(lines, MENU_GRID_COLOR, (0, y), (SCREEN_WIDTH, y), 1)
+        return lines
+    
     def create_particle(self):
         """創建背景魔法粒子"""
         import random
@@ -103,14 +135,7 @@ class MainMenu:
         size = random.randint(2, 5)
         life = random.randint(60, 120)
         
-        return {
-            'x': x, 'y': y, 
-            'vx': vx, 'vy': vy,
-            'color': color,
-            'size': size,
-            'life': life,
-            'max_life': life
-        }
+        self.particles.add_particle(x, y, color, (vx, vy), life, size)
     
     def update(self):
         # 背景滾動
@@ -121,54 +146,36 @@ class MainMenu:
         # 粒子生成
         self.particle_timer += 1
         if self.particle_timer > 10:
-            self.particles.append(self.create_particle())
+            self.create_particle()
             self.particle_timer = 0
         
-        # 粒子更新
-        for p in self.particles[:]:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            p['life'] -= 1
-            
-            if p['life'] <= 0 or p['y'] < -10:
-                self.particles.remove(p)
+        # 粒子更新（死亡的粒子在下一次更新時移除）
+        particles = self.particles
+        particles.update()
+        # Particles that drifted off the top are done as well
+        n = particles.count
+        particles.life[:n][particles.y[:n] < -10] = 0
     
     def draw(self):
-        # 背景漸層
-        for y in range(SCREEN_HEIGHT):
-            ratio = y / SCREEN_HEIGHT
-            r = int(10 + ratio * 20)
-            g = int(5 + ratio * 10)
-            b = int(20 + ratio * 40)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (SCREEN_WIDTH, y))
-        
-        # 背景網格（營造魔法陣感）
-        grid_color = (40, 20, 60, 50)
-        for x in range(0, SCREEN_WIDTH, 50):
-            pygame.draw.line(self.screen, grid_color, (x, 0), (x, SCREEN_HEIGHT), 1)
-        for y in range(int(self.bg_offset), SCREEN_HEIGHT, 50):
-            pygame.draw.line(self.screen, grid_color, (0, y), (SCREEN_WIDTH, y), 1)
+        # 背景（預先畫好）
+        self.screen.blit(self.backdrop, (0, 0))
+        self.screen.blit(self.grid_lines, (0, int(self.bg_offset)))
         
         # 粒子
-        for p in self.particles:
-            alpha = int(255 * (p['life'] / p['max_life']))
-            color = (*p['color'], alpha)
-            s = pygame.Surface((p['size']*2, p['size']*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, color, (p['size'], p['size']), p['size'])
-            self.screen.blit(s, (p['x'] - p['size'], p['y'] - p['size']))
+        self.particles.draw(self.screen, (0, 0))
         
         # 標題
-        title = self.font_title.render("Eclipse Contract", True, (200, 150, 255))
+        title = fonts.render(self.font_title, "Eclipse Contract", (200, 150, 255))
         title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 150))
         
         # 標題陰影
-        shadow = self.font_title.render("Eclipse Contract", True, (50, 20, 80))
+        shadow = fonts.render(self.font_title, "Eclipse Contract", (50, 20, 80))
         shadow_rect = shadow.get_rect(center=(SCREEN_WIDTH//2 + 3, 153))
         self.screen.blit(shadow, shadow_rect)
         self.screen.blit(title, title_rect)
         
         # 副標題
-        subtitle = self.font_subtitle.render("The Necromancer's Debt", True, (180, 180, 200))
+        subtitle = fonts.render(self.font_subtitle, "The Necromancer's Debt", (180, 180, 200))
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH//2, 220))
         self.screen.blit(subtitle, subtitle_rect)
         
@@ -177,7 +184,7 @@ class MainMenu:
             button.draw(self.screen, self.font_button)
         
         # 版本號
-        version = pygame.font.SysFont("Arial", 14).render("Alpha 0.2", True, (100, 100, 120))
+        version = fonts.render(self.font_version, "Alpha 0.2", (100, 100, 120))
         self.screen.blit(version, (10, SCREEN_HEIGHT - 25))
     
     def handle_event(self, event):
@@ -204,5 +211,7 @@ class MainMenu:
 
 def show_main_menu(screen):
     """顯示主選單並返回下一個狀態"""
+    # Decode game images in the background while the menu is up
+    assets.preload()
     menu = MainMenu(screen)
     return menu.run()
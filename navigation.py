@@ -0,0 +1,255 @@
+# navigation.py
+"""
+導航網格與 A* 尋路
+關卡碰撞資料（障礙矩形，世界座標）光柵化成導航格子；Pathfinder 以 A*（8 方向、不切角）找路後做直線化，
+路徑以 (起點格, 終點格) 為鍵共用快取，地圖改變時整個作廢
+新的尋路要求先排隊，每幀最多計算 PATH_BUDGET 條（先到先算），還沒算好的路徑照原本直線前進，
+一整波敵人同一幀要求重新尋路也不會卡住遊戲
+沒有障礙、或起點格能直線看到終點格時不繞路，行為與原本完全相同
+追擊移動中的目標時查目標所在格的流場（共用、每格 O(1)），流場還在排隊時才改走 A* 路徑
+"""
+import heapq
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+from settings import *
+from flowfield import NEIGHBOURS, SQRT2, FlowFields
+from influence import InfluenceMap
+
+def blocked_cells(rects, cell_size, cols, rows):
+    """和任一障礙矩形重疊的格子集合"""
+    cells = set()
+    for rect in rects:
+        x0 = max(int(rect.left // cell_size), 0)
+        y0 = max(int(rect.top // cell_size), 0)
+        x1 = min(int((rect.right - 1) // cell_size), cols - 1)
+        y1 = min(int((rect.bottom - 1) // cell_size), rows - 1)
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                cells.add((cx, cy))
+    return cells
+
+def route(nav, pos, goal, diff):
+    """pos 往 goal 的方向 diff；被障礙擋住時改朝路徑上的下一個轉折點"""
+    if nav:
+        waypoint = nav.paths.waypoint(pos.x, pos.y, goal.x, goal.y)
+        if waypoint:
+            return pygame.math.Vector2(waypoint[0] - pos.x, waypoint[1] - pos.y)
+    return diff
+
+def route_batch(nav, x, y, gx, gy, dx, dy, dist, mask):
+    """批次版 route：mask 內被障礙擋住的實體，(dx, dy, dist) 陣列改成往下一個轉折點"""
+    if not (nav and nav.grid.blocked):
+        return
+    waypoint = nav.paths.waypoint
+    for i in np.flatnonzero(mask).tolist():
+        point = waypoint(x[i], y[i], gx[i], gy[i])
+        if point:
+            dx[i] = point[0] - x[i]
+            dy[i] = point[1] - y[i]
+            dist[i] = math.sqrt(dx[i] * dx[i] + dy[i] * dy[i])
+
+def chase_detour(nav, x, y, target):
+    """
+    (x, y) 追擊 target 時的繞路方向 (dx, dy)；能直線看到目標時回傳 None
+    方向取自 target 所在格的流場；流場還在排隊時暫時改查 A* 路徑
+    """
+    flow = nav.flow
+    if not flow.blocked:
+        return None  # Open level: the straight line is exact
+    goal_x, goal_y = target.pos.x, target.pos.y
+    field = flow.field(flow.cell_of(goal_x, goal_y))
+    if field is not None:
+        return field.step(*flow.cell_of(x, y))
+    waypoint = nav.paths.waypoint(x, y, goal_x, goal_y)
+    if waypoint:
+        return waypoint[0] - x, waypoint[1] - y
+    return None
+
+def chase(nav, pos, target, diff):
+    """pos 追擊 target 的方向 diff；被障礙擋住時改用流場（或 A* 路徑）的繞路方向"""
+    if nav:
+        step = chase_detour(nav, pos.x, pos.y, target)
+        if step:
+            return pygame.math.Vector2(step)
+    return diff
+
+def chase_batch(nav, x, y, targets, dx, dy, dist, mask):
+    """批次版 chase：mask 內被障礙擋住的實體，(dx, dy, dist) 陣列改成繞路方向"""
+    if not (nav and nav.flow.blocked):
+        return
+    for i in np.flatnonzero(mask).tolist():
+        step = chase_detour(nav, x[i], y[i], targets[i])
+        if step:
+            dx[i], dy[i] = step
+            dist[i] = math.sqrt(dx[i] * dx[i] + dy[i] * dy[i])
+
+class NavGrid:
+    """由障礙矩形光柵化的導航格子"""
+    def __init__(self, rects=(), cell_size=NAV_CELL_SIZE, width=WORLD_WIDTH, height=WORLD_HEIGHT):
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.set_obstacles(rects)
+
+    def set_obstacles(self, rects):
+        self.rects = [pygame.Rect(rect) for rect in rects]
+        self.blocked = blocked_cells(self.rects, self.cell_size, self.cols, self.rows)
+
+    def cell_of(self, x, y):
+        cx = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return cx, cy
+
+    def center(self, cell):
+        return ((cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size)
+
+    def passable(self, cx, cy):
+        return 0 <= cx < self.cols and 0 <= cy < self.rows and (cx, cy) not in self.blocked
+
+    def moves(self, cx, cy):
+        passable = self.passable
+        for dx, dy, step in NEIGHBOURS:
+            if not passable(cx + dx, cy + dy):
+                continue
+            if dx and dy and not (passable(cx + dx, cy) and passable(cx, cy + dy)):
+                continue
+            yield dx, dy, step
+
+    def line_clear(self, a, b):
+        """兩格中心之間的直線（以 1/4 格為間距取樣）是否沒有障礙"""
+        (ax, ay), (bx, by) = a, b
+        steps = int(max(abs(bx - ax), abs(by - ay)) * 4)
+        blocked = self.blocked
+        for i in range(1, steps):
+            t = i / steps
+            if (int(ax + 0.5 + (bx - ax) * t), int(ay + 0.5 + (by - ay) * t)) in blocked:
+                return False
+        return True
+
+    def find_path(self, start, goal):
+        """
+        A* 找 start → goal 的路徑並直線化
+        回傳轉折點格子的 tuple（不含起點，最後一個是終點）；能直線前往或無路可走時回傳 ()
+        """
+        if start in self.blocked or goal in self.blocked or self.line_clear(start, goal):
+            return ()
+        gx, gy = goal
+
+        def heuristic(cell):
+            # Octile distance
+            dx, dy = abs(cell[0] - gx), abs(cell[1] - gy)
+            return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+        cost = {start: 0.0}
+        came_from = {}
+        heap = [(heuristic(start), 0.0, start)]
+        while heap:
+            _, c, cell = heapq.heappop(heap)
+            if cell == goal:
+                break
+            if c > cost[cell]:
+                continue
+            cx, cy = cell
+            for dx, dy, step in self.moves(cx, cy):
+                nxt = (cx + dx, cy + dy)
+                nc = c + step
+                if nc < cost.get(nxt, math.inf):
+                    cost[nxt] = nc
+                    came_from[nxt] = cell
+                    heapq.heappush(heap, (nc + heuristic(nxt), nc, nxt))
+        else:
+            return ()  # Unreachable
+
+        cells = [goal]
+        while cells[-1] != start:
+            cells.append(came_from[cells[-1]])
+        cells.reverse()
+
+        # String pulling: jump to the farthest cell still in a straight line
+        path = []
+        i = 0
+        while i < len(cells) - 1:
+            j = len(cells) - 1
+            while j > i + 1 and not self.line_clear(cells[i], cells[j]):
+                j -= 1
+            path.append(cells[j])
+            i = j
+        return tuple(path)
+
+class Pathfinder:
+    """共用路徑快取與每幀尋路預算"""
+    def __init__(self, grid, budget=PATH_BUDGET, capacity=PATH_CACHE_SIZE):
+        self.grid = grid
+        self.budget = budget
+        self.capacity = capacity
+        self.paths = OrderedDict()  # (start cell, goal cell) -> waypoint cells, least recently used first
+        self.pending = {}           # (start cell, goal cell) -> frame requested
+        self.frame = 0
+        self.searches = 0
+
+    def invalidate(self):
+        """地圖改變：所有快取與排隊中的路徑作廢"""
+        self.paths.clear()
+        self.pending.clear()
+
+    def begin_frame(self):
+        """計算排隊中最早的 budget 條路徑"""
+        self.frame += 1
+        if not self.pending:
+            return
+        # Oldest requests first, ties by key: the same requests give the same searches in any order
+        for key, _ in heapq.nsmallest(self.budget, self.pending.items(), key=lambda item: (item[1], item[0])):
+            del self.pending[key]
+            self.store(key, self.grid.find_path(*key))
+            self.searches += 1
+
+    def store(self, key, path):
+        self.paths[key] = path
+        if len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+
+    def waypoint(self, x, y, gx, gy):
+        """(x, y) 往 (gx, gy) 時下一個要去的點；可以直線前往（或路徑還在排隊）時回傳 None"""
+        grid = self.grid
+        if not grid.blocked:
+            return None
+        start = grid.cell_of(x, y)
+        goal = grid.cell_of(gx, gy)
+        if start == goal:
+            return None
+        key = (start, goal)
+        path = self.paths.get(key)
+        if path is None:
+            self.pending.setdefault(key, self.frame)
+            return None
+        self.paths.move_to_end(key)
+        if not path or path[0] == goal:
+            return None
+        return grid.center(path[0])
+
+class Navigation:
+    """遊戲的導航資料：導航格子、路徑快取、流場與威脅影響圖"""
+    def __init__(self, rects=()):
+        self.grid = NavGrid()
+        self.paths = Pathfinder(self.grid)
+        self.flow = FlowFields()
+        self.influence = InfluenceMap()
+        self.set_obstacles(rects)
+
+    def set_obstacles(self, rects):
+        """更換關卡碰撞資料，快取的路徑與流場全部重算"""
+        self.grid.set_obstacles(rects)
+        self.paths.invalidate()
+        flow = self.flow
+        flow.set_blocked(blocked_cells(self.grid.rects, flow.cell_size, flow.cols, flow.rows))
+
+    def update(self, player, units, enemies):
+        self.paths.begin_frame()
+        self.flow.begin_frame()
+        influence = self.influence
+        if influence.needed:
+            influence.update(player, units, enemies)
+        elif influence.stamped:
+            influence.reset()  # Restamped from scratch when needed again
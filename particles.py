@@ -1,59 +1,148 @@
 # particles.py
+"""
+粒子系統
+粒子存放在預先配置、固定容量的 NumPy 陣列中（每個欄位一個陣列），
+死亡的粒子以尾端的粒子填補 (swap-remove)，每幀以向量運算一次更新全部粒子，不再產生 Python 物件
+繪製時使用預先畫好的粒子圖快取（依顏色、大小、量化後的透明度），並以一次批次 blit 畫出
+"""
+import math
+import numpy as np
 import pygame
-import random
-
-class Particle:
-    def __init__(self, x, y, color, velocity, life):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.vx = velocity[0]
-        self.vy = velocity[1]
-        self.life = life
-        self.max_life = life
-        self.size = random.randint(2, 5)
+import rng
+from settings import PARTICLE_CAPACITY, PARTICLE_ALPHA_STEP
 
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.life -= 1
-        self.size = max(0, self.size - 0.1)
+class ParticleSpriteCache:
+    """預先繪製的粒子圖：(顏色, 大小, 透明度) -> Surface，透明度量化成 alpha_step 的倍數"""
+    def __init__(self, alpha_step=PARTICLE_ALPHA_STEP):
+        self.alpha_step = alpha_step
+        self.sprites = {}
 
-    def draw(self, surface, camera_offset):
-        if self.life > 0:
-            # Fade out alpha
-            alpha = int((self.life / self.max_life) * 255)
-            s = pygame.Surface((int(self.size)*2, int(self.size)*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (*self.color, alpha), (int(self.size), int(self.size)), int(self.size))
-            
-            pos = (int(self.x) + camera_offset[0], int(self.y) + camera_offset[1])
-            surface.blit(s, pos)
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, color, size, alpha, additive=False):
+        step = self.alpha_step
+        alpha = min(255, (alpha + step // 2) // step * step)
+        key = (color, size, alpha, additive)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self.render(color, size, alpha, additive)
+        return sprite
+
+    def render(self, color, size, alpha, additive):
+        if additive:
+            # Additive blending ignores per-pixel alpha, so bake the fade into the color on black
+            sprite = pygame.Surface((size * 2, size * 2))
+            sprite.fill((0, 0, 0))
+            pygame.draw.circle(sprite, [c * alpha // 255 for c in color], (size, size), size)
+        else:
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*color, alpha), (size, size), size)
+        return sprite
+
+# Shared by the game and the main menu
+particle_sprites = ParticleSpriteCache()
+
+def blit_particles(surface, blit_sequence, additive=False):
+    """以單次呼叫畫出 [(粒子圖, 位置), ...]"""
+    flags = pygame.BLEND_RGB_ADD if additive else 0
+    if hasattr(surface, "fblits"):
+        surface.fblits(blit_sequence, flags)
+    else:
+        # Upstream pygame: blits() takes the flags per entry
+        surface.blits([(sprite, pos, None, flags) for sprite, pos in blit_sequence], False)
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
+    def __init__(self, capacity=PARTICLE_CAPACITY, additive=False, shrink=0.1, centered=False):
+        self.capacity = capacity
+        self.additive = additive
+        self.shrink = shrink      # Size lost per frame
+        self.centered = centered  # Draw centred on (x, y) instead of from the top-left corner
+        self.count = 0
+        self.dropped = 0  # Particles rejected because the pool was full
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+        self.max_life = np.ones(capacity)
+        self.size = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+
+    def __len__(self):
+        return self.count
 
-    def add_particle(self, x, y, color, velocity, life):
-        self.particles.append(Particle(x, y, color, velocity, life))
+    def add_particle(self, x, y, color, velocity, life, size=None):
+        if size is None:
+            size = rng.stream("particles").randint(2, 5)
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = velocity[0]
+        self.vy[i] = velocity[1]
+        self.life[i] = life
+        self.max_life[i] = life
+        self.size[i] = size
+        self.color[i] = color
+        self.count = i + 1
 
     def emit_summon_effect(self, x, y):
         # Burst of purple/cyan particles
+        rand = rng.stream("particles")
         for _ in range(20):
-            angle = random.uniform(0, 6.28)
-            speed = random.uniform(1, 3)
+            angle = rand.uniform(0, 6.28)
+            speed = rand.uniform(1, 3)
             vx = math.cos(angle) * speed
             vy = math.sin(angle) * speed
-            
-            color = random.choice([(148, 0, 211), (0, 255, 255), (75, 0, 130)])
-            self.add_particle(x, y, color, (vx, vy), random.randint(20, 40))
+
+            color = rand.choice([(148, 0, 211), (0, 255, 255), (75, 0, 130)])
+            self.add_particle(x, y, color, (vx, vy), rand.randint(20, 40))
+
+    def remove_dead(self):
+        """移除 life <= 0 的粒子：前段的空位由尾端存活的粒子補上"""
+        n = self.count
+        alive = self.life[:n] > 0
+        keep = int(np.count_nonzero(alive))
+        if keep == n:
+            return
+        holes = np.flatnonzero(~alive[:keep])
+        movers = np.flatnonzero(alive[keep:]) + keep
+        for column in (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.size, self.color):
+            column[holes] = column[movers]
+        self.count = keep
 
     def update(self):
-        self.particles = [p for p in self.particles if p.life > 0]
-        for p in self.particles:
-            p.update()
+        self.remove_dead()
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.life[:n] -= 1
+        if self.shrink:
+            size = self.size[:n]
+            np.maximum(size - self.shrink, 0, out=size)
 
     def draw(self, surface, camera_offset):
-        for p in self.particles:
-            p.draw(surface, camera_offset)
+        n = self.count
+        if not n:
+            return
+        # Zero-sized particles draw nothing
+        live = np.flatnonzero((self.life[:n] > 0) & (self.size[:n] >= 1))
+        # Fade out alpha
+        alpha = (self.life[live] / self.max_life[live] * 255).astype(int)
+        size = self.size[live].astype(int)
+        px = np.trunc(self.x[live]).astype(int) + camera_offset[0]
+        py = np.trunc(self.y[live]).astype(int) + camera_offset[1]
+        if self.centered:
+            px -= size
+            py -= size
+        colors = self.color[live]
 
-import math
+        get = particle_sprites.get
+        additive = self.additive
+        blit_particles(surface, [
+            (get((r, g, b), s, a, additive), (x, y))
+            for (r, g, b), a, s, x, y in zip(colors.tolist(), alpha.tolist(), size.tolist(), px.tolist(), py.tolist())
+        ], additive)
@@ -1,5 +1,6 @@
 # physics.py
 from settings import *
+from spatial import update_index
 
 class Physics:
     def __init__(self):
@@ -43,3 +44,6 @@ class Physics:
         # We draw at (x, y - z)
         entity.rect.x = int(entity.pos.x)
         entity.rect.y = int(entity.pos.y - entity.z)
+        
+        # Keep the spatial index in sync
+        update_index(entity)
@@ -0,0 +1,118 @@
+# profiler.py
+"""
+幀效能分析器
+以固定大小的環形緩衝區記錄每幀各階段耗時，按 F3 顯示疊加圖表
+"""
+import time
+import pygame
+import fonts
+from settings import *
+
+class FrameProfiler:
+    """每幀分段計時（環形緩衝區，記錄成本極低）"""
+    def __init__(self, phases, history=180):
+        self.phases = list(phases)
+        self.history = history
+        self.samples = {name: [0.0] * history for name in self.phases}
+        self.frame_times = [0.0] * history
+        self.index = 0
+        self.count = 0
+        self.frame_start = None
+
+        # Extra counters shown in the overlay (e.g. collision pair tests)
+        self.stats = {}
+
+        self.visible = False
+        self.font = None
+
+    def measure(self, name, func):
+        """執行 func 並記錄耗時到本幀的 name 欄位"""
+        start = time.perf_counter()
+        func()
+        self.samples[name][self.index] = time.perf_counter() - start
+
+    def end_frame(self):
+        """結束一幀：記錄整幀時間並前進環形緩衝區"""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times[self.index] = now - self.frame_start
+        self.frame_start = now
+
+        self.index = (self.index + 1) % self.history
+        self.count = min(self.count + 1, self.history)
+        # Phases skipped this frame (e.g. draw while headless) must not keep a sample from `history` frames ago
+        for samples in self.samples.values():
+            samples[self.index] = 0.0
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def recent(self, values):
+        """回傳環形緩衝區中最近 count 幀的樣本（由舊到新）"""
+        start = (self.index - self.count) % self.history
+        if start + self.count <= self.history:
+            return values[start:start + self.count]
+        return values[start:] + values[:self.index]
+
+    def average(self, name):
+        if self.count == 0:
+            return 0.0
+        return sum(self.recent(self.samples[name])) / self.count
+
+    def draw(self, surface):
+        """繪製疊加圖表（右上角）"""
+        if not self.visible:
+            return
+        if self.font is None:
+            self.font = fonts.get_font("Arial", 12)
+
+        graph_w = self.history
+        graph_h = 80
+        line_h = 14
+        width = graph_w + 20
+        height = graph_h + 40 + line_h * (len(self.phases) + len(self.stats))
+        x = SCREEN_WIDTH - width - 10
+        y = 10
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        surface.blit(panel, (x, y))
+
+        # Frame time graph (scale: 2x budget at full height)
+        budget = 1.0 / FPS
+        gx = x + 10
+        gy = y + 10
+        frames = self.recent(self.frame_times)
+        for i, frame_time in enumerate(frames):
+            h = min(graph_h, int(frame_time / (budget * 2) * graph_h))
+            if frame_time <= budget:
+                color = (50, 200, 50)
+            elif frame_time <= budget * 1.5:
+                color = (230, 200, 40)
+            else:
+                color = (230, 50, 50)
+            pygame.draw.line(surface, color, (gx + i, gy + graph_h), (gx + i, gy + graph_h - h))
+        # Budget line (1 / FPS)
+        pygame.draw.line(surface, (200, 200, 200), (gx, gy + graph_h // 2), (gx + graph_w, gy + graph_h // 2))
+
+        # Summary
+        avg_frame = sum(frames) / len(frames) if frames else 0.0
+        fps = 1.0 / avg_frame if avg_frame > 0 else 0.0
+        text_y = gy + graph_h + 6
+        fonts.atlas(self.font, (255, 255, 255)).draw(surface, f"Frame {avg_frame * 1000:.2f} ms  ({fps:.0f} FPS)", (gx, text_y))
+        text_y += line_h + 4
+
+        # Per-phase averages
+        for name in self.phases:
+            ms = self.average(name) * 1000
+            color = (255, 120, 120) if ms > budget * 1000 * 0.25 else (200, 200, 200)
+            surface.blit(fonts.render(self.font, name, color), (gx, text_y))
+            # Values change every frame: compose them from cached glyphs
+            glyphs = fonts.atlas(self.font, color)
+            value = f"{ms:.2f} ms"
+            glyphs.draw(surface, value, (gx + graph_w - glyphs.width(value), text_y))
+            text_y += line_h
+
+        for name, value in self.stats.items():
+            fonts.atlas(self.font, (150, 200, 255)).draw(surface, f"{name}: {value}", (gx, text_y))
+            text_y += line_h
@@ -0,0 +1,69 @@
+# replay.py
+"""
+錄影與回放
+記錄每幀的移動按鍵與遊戲指令（已換算成世界座標的射擊、召喚、切換模式…）以及亂數種子，
+回放時以相同種子重建 Game 並逐幀餵回，模擬結果與原本完全相同
+"""
+import json
+import pygame
+from controls import ScriptedInput
+
+REPLAY_VERSION = 1
+
+# Held keys that affect the simulation (Player movement)
+RECORDED_KEYS = [
+    pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s,
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+]
+
+class ReplayRecorder:
+    """錄下一整段遊戲過程"""
+    def __init__(self, seed, path=None):
+        self.seed = seed
+        self.path = path
+        self.frames = []
+
+    def begin_frame(self, keys):
+        """開始記錄新的一幀（在讀取輸入之後呼叫）"""
+        frame = {}
+        pressed = [key for key in RECORDED_KEYS if keys[key]]
+        if pressed:
+            frame["keys"] = pressed
+        self.frames.append(frame)
+
+    def record_command(self, command):
+        if not self.frames:
+            self.frames.append({})
+        self.frames[-1].setdefault("commands", []).append(list(command))
+
+    def to_dict(self):
+        return {"version": REPLAY_VERSION, "seed": self.seed, "frames": self.frames}
+
+    def save(self, path=None):
+        path = path or self.path
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        print(f"Replay saved to: {path} ({len(self.frames)} frames)")
+
+class ReplayInput(ScriptedInput):
+    """回放輸入 - 依序送出錄下的按鍵與指令；有視窗時仍處理關閉視窗與 F3 / F4"""
+    def __init__(self, frames, seed):
+        super().__init__(frames)
+        self.seed = seed
+
+    def poll(self):
+        events, keys, commands = super().poll()
+        if pygame.display.get_surface() is not None:
+            events = [
+                e for e in pygame.event.get()
+                if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key in (pygame.K_F3, pygame.K_F4))
+            ]
+        return events, keys, commands
+
+def load_replay(path):
+    """讀取錄影檔，回傳 ReplayInput（其 seed 需傳給 Game）"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version: {data.get('version')}")
+    return ReplayInput(data["frames"], data["seed"])
@@ -0,0 +1,34 @@
+# rng.py
+"""
+具名亂數串流
+每個系統使用自己的 random.Random，全部由同一個種子衍生，讓錄影回放能逐幀重現
+"""
+import random
+
+class RandomStreams:
+    """由單一種子衍生出的具名亂數串流"""
+    def __init__(self, seed=0):
+        self.streams = {}
+        self.seed(seed)
+
+    def seed(self, seed):
+        """重設種子（會清空所有已建立的串流）"""
+        self.base_seed = seed
+        self.streams.clear()
+
+    def get(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = random.Random(f"{self.base_seed}:{name}")
+            self.streams[name] = stream
+        return stream
+
+# Shared streams used by gameplay code
+streams = RandomStreams()
+
+def seed(value):
+    streams.seed(value)
+
+def stream(name):
+    """取得具名串流，例如 stream("loot").uniform(-2, 2)"""
+    return streams.get(name)
@@ -10,6 +10,17 @@ TITLE = "Eclipse Contract (Python)"
 # World Settings
 WORLD_WIDTH = 2000
 WORLD_HEIGHT = 1500
+SPATIAL_CELL_SIZE = 100 # Spatial hash cell size
+FLOW_CELL_SIZE = 100 # Flow field grid cell size (see flowfield.py)
+FLOW_BUDGET = 4 # Max new flow fields (one per chased target cell) built per frame
+FLOW_CACHE_SIZE = 300 # Flow fields kept (least recently used dropped first)
+NAV_CELL_SIZE = 50 # A* navigation grid cell size (see navigation.py)
+PATH_BUDGET = 8 # Path searches run per frame; later requests wait in a queue and move straight meanwhile
+PATH_CACHE_SIZE = 4096 # Paths kept by the shared (start cell, goal cell) cache (LRU)
+LEVEL_OBSTACLES = [] # Level collision data: obstacle rects (x, y, w, h) in world coordinates
+BACKGROUND_CHUNK_SIZE = 512 # Cached world background tile size
+CULL_MARGIN = 100 # Extra pixels around the view kept when culling (shadows below, HP bars above, z-height)
+AI_BACKEND = "batch" # "batch" (NumPy, units grouped by behavior) or "scalar" (one AIBehavior.update per unit)
 
 # Colors
 COLOR_BG = (10, 10, 12) # Dark
@@ -23,3 +34,23 @@ COLOR_GRID = (255, 255, 255, 10) # Alpha not supported directly in tuple for som
 GRAVITY = 0.9
 FRICTION = 0.85
 GROUND_HORIZON = 200 # Min Y
+
+# Combat
+THREAT_MAX = 5 # Highest threat of any unit (Ghoul) - bounds enemy target searches
+TARGETING = "exact" # "exact" (dist / threat over the targets in range) or "influence" (threat map peaks, see influence.py)
+INFLUENCE_CELL_SIZE = 50 # Threat influence map cell size
+INFLUENCE_RADIUS = 4 # Cells a unit's threat spreads over (linear falloff)
+
+# Assets
+ASSET_BUDGET = 64 * 1024 * 1024 # Bytes of decoded images kept by the asset cache (LRU beyond this)
+ASSET_MANIFEST = ["assets/player.png", "assets/ghoul.png"] # Preloaded while the main menu is shown
+
+# UI
+DEBUG_RANGES = False # Start with enemy attack ranges shown (F4 cycles the debug range layer)
+TEXT_CACHE_SIZE = 256 # Rendered text surfaces kept by fonts.render (LRU)
+MENU_GRID_COLOR = (40, 20, 60)
+MENU_PARTICLE_CAPACITY = 64 # Menu spawns one particle every 11 frames, each lives at most 120
+
+# Effects
+PARTICLE_CAPACITY = 4000 # Max live particles; new ones are dropped when the pool is full
+PARTICLE_ALPHA_STEP = 16 # Particle fade is quantized to this many alpha units (sprite cache size)
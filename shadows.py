@@ -0,0 +1,47 @@
+# shadows.py
+"""
+陰影繪製
+每種陰影形狀 (寬, 高, 透明度) 只預先畫一次；每幀走訪一次所有 sprite 收集陰影位置，
+略過畫面外的陰影後以單次批次 blit 畫出
+sprite 以類別屬性 shadow = (寬, 高, 透明度) 與 shadow_offset = (dx, dy) 描述陰影（以 pos + offset 為中心）
+"""
+import pygame
+
+class ShadowRenderer:
+    """共用的陰影圖快取與批次繪製"""
+    def __init__(self):
+        self.surfaces = {}  # (w, h, alpha) -> Surface
+
+    def get(self, shape):
+        surface = self.surfaces.get(shape)
+        if surface is None:
+            w, h, alpha = shape
+            surface = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.ellipse(surface, (0, 0, 0, alpha), (0, 0, w, h))
+            self.surfaces[shape] = surface
+        return surface
+
+    def draw(self, surface, sprites, camera_offset):
+        """畫出 sprites 的陰影；回傳實際畫出的數量"""
+        ox, oy = camera_offset
+        screen_w, screen_h = surface.get_size()
+        get = self.get
+        blits = []
+        for sprite in sprites:
+            shape = getattr(sprite, "shadow", None)
+            if shape is None:
+                continue
+            dx, dy = sprite.shadow_offset
+            w, h, _ = shape
+            left = int(sprite.pos.x + dx) + ox - w // 2
+            top = int(sprite.pos.y + dy) + oy - h // 2
+            # Skip shadows that are entirely off screen
+            if left >= screen_w or top >= screen_h or left + w <= 0 or top + h <= 0:
+                continue
+            blits.append((get(shape), (left, top)))
+
+        if hasattr(surface, "fblits"):
+            surface.fblits(blits)
+        else:
+            surface.blits(blits, False)
+        return len(blits)
@@ -0,0 +1,178 @@
+# spatial.py
+"""
+空間索引（均勻網格雜湊）
+把世界切成固定大小的格子，支援半徑、最近 k 個與矩形查詢
+SpatialGroup 是會自動維護索引的 sprite 群組；物理系統移動實體時會增量更新所在格子
+"""
+import math
+import pygame
+from settings import *
+
+class SpatialHash:
+    """均勻網格空間雜湊（以實體的 pos 為準）"""
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}         # (cx, cy) -> {entity: None} (dict keeps insertion order)
+        self.entity_cells = {}  # entity -> (cx, cy)
+        # Ring search limit for nearest(): enough to cover the whole world
+        self.max_ring = max(WORLD_WIDTH, WORLD_HEIGHT) // cell_size + 1
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def __contains__(self, entity):
+        return entity in self.entity_cells
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, entity):
+        key = self.cell_of(entity.pos.x, entity.pos.y)
+        self.entity_cells[entity] = key
+        self.cells.setdefault(key, {})[entity] = None
+
+    def remove(self, entity):
+        key = self.entity_cells.pop(entity, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[entity]
+        if not cell:
+            del self.cells[key]
+
+    def update(self, entity):
+        """實體移動後呼叫；只有跨格子時才搬動"""
+        key = self.cell_of(entity.pos.x, entity.pos.y)
+        old_key = self.entity_cells.get(entity)
+        if key == old_key or old_key is None:
+            return
+        cell = self.cells[old_key]
+        del cell[entity]
+        if not cell:
+            del self.cells[old_key]
+        self.entity_cells[entity] = key
+        self.cells.setdefault(key, {})[entity] = None
+
+    def query_rect(self, rect):
+        """回傳 pos 落在 rect 內的實體"""
+        x0, y0 = self.cell_of(rect.left, rect.top)
+        x1, y1 = self.cell_of(rect.right, rect.bottom)
+        result = []
+        cells = self.cells
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    for entity in cell:
+                        if rect.collidepoint(entity.pos):
+                            result.append(entity)
+        return result
+
+    def query_radius(self, pos, radius):
+        """回傳與 pos 距離 <= radius 的實體"""
+        px, py = pos.x, pos.y
+        x0, y0 = self.cell_of(px - radius, py - radius)
+        x1, y1 = self.cell_of(px + radius, py + radius)
+        r2 = radius * radius
+        result = []
+        cells = self.cells
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    for entity in cell:
+                        dx = entity.pos.x - px
+                        dy = entity.pos.y - py
+                        if dx * dx + dy * dy <= r2:
+                            result.append(entity)
+        return result
+
+    def nearest(self, pos, k=1, max_radius=None):
+        """回傳離 pos 最近的 k 個實體（由近到遠），可限制最大距離"""
+        px, py = pos.x, pos.y
+        ccx, ccy = self.cell_of(px, py)
+        limit = math.inf if max_radius is None else max_radius * max_radius
+        found = []  # (dist2, order, entity)
+        cells = self.cells
+        max_ring = self.max_ring
+        if max_radius is not None:
+            max_ring = min(max_ring, int(max_radius // self.cell_size) + 1)
+
+        for ring in range(max_ring + 1):
+            for cx in range(ccx - ring, ccx + ring + 1):
+                # Only the border of the ring (inner cells were already visited)
+                step = 1 if cx in (ccx - ring, ccx + ring) else 2 * ring or 1
+                for cy in range(ccy - ring, ccy + ring + 1, step):
+                    cell = cells.get((cx, cy))
+                    if cell:
+                        for entity in cell:
+                            dx = entity.pos.x - px
+                            dy = entity.pos.y - py
+                            d2 = dx * dx + dy * dy
+                            if d2 <= limit:
+                                found.append((d2, len(found), entity))
+            # Cells in the next ring are at least ring * cell_size away
+            if len(found) >= k:
+                found.sort()
+                bound = ring * self.cell_size
+                if found[k - 1][0] <= bound * bound:
+                    break
+        found.sort()
+        return [entity for _, _, entity in found[:k]]
+
+class SpatialGroup(pygame.sprite.Group):
+    """自動維護空間索引的 sprite 群組"""
+    def __init__(self, *sprites, cell_size=SPATIAL_CELL_SIZE):
+        self.spatial = SpatialHash(cell_size)
+        super().__init__(*sprites)
+
+    # pygame's Group builds a list of every sprite for len() and truth tests
+    def __len__(self):
+        return len(self.spritedict)
+
+    def __bool__(self):
+        return bool(self.spritedict)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.spatial.insert(sprite)
+        sprite.spatial_index = self.spatial
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.spatial.remove(sprite)
+        if getattr(sprite, "spatial_index", None) is self.spatial:
+            sprite.spatial_index = None
+
+def update_index(entity):
+    """實體移動後更新它所屬的空間索引（若有）"""
+    index = getattr(entity, "spatial_index", None)
+    if index is not None:
+        index.update(entity)
+
+def nearest_in(sprites, pos, max_radius=None):
+    """回傳 (最近的實體, 距離)；sprites 可以是 SpatialGroup 或一般序列"""
+    index = getattr(sprites, "spatial", None)
+    if index is not None:
+        found = index.nearest(pos, 1, max_radius)
+        if not found:
+            return None, math.inf
+        return found[0], pos.distance_to(found[0].pos)
+
+    closest = None
+    min_dist = math.inf
+    for sprite in sprites:
+        dist = pos.distance_to(sprite.pos)
+        if dist < min_dist:
+            min_dist = dist
+            closest = sprite
+    if max_radius is not None and min_dist > max_radius:
+        return None, math.inf
+    return closest, min_dist
+
+def within(sprites, pos, radius):
+    """回傳 sprites 中與 pos 距離 <= radius 的實體"""
+    index = getattr(sprites, "spatial", None)
+    if index is not None:
+        return index.query_radius(pos, radius)
+    return [sprite for sprite in sprites if pos.distance_to(sprite.pos) <= radius]
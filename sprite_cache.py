@@ -0,0 +1,84 @@
+# sprite_cache.py
+"""
+共用 sprite 圖片快取
+每種 sprite 的每個朝向（以及之後的每個動畫影格）只產生一次，所有實例共用同一張 Surface，
+sprite 轉向時只需換參照，不必重新翻轉或重畫
+程序繪製、不分朝向的外觀（敵人、掉落物、飛彈…）以模板登記，每種類型 / 變體只畫一次
+共用的 Surface 不可直接修改；需要修改時先呼叫 writable(sprite) 取得自己的複本 (copy-on-write)
+由圖檔產生的種類登記時附上圖檔路徑：資源管理器淘汰或作廢那張圖時（例如編輯器覆寫了檔案），
+這個種類的快取一起丟棄，下次取用時重新載入
+"""
+import pygame
+import assets
+
+class SpriteImageCache:
+    """(種類, 朝右, 影格) -> Surface"""
+    def __init__(self):
+        self.builders = {}
+        self.images = {}
+        self.shared = set()  # id() of every cached Surface
+        self.sources = {}    # asset key -> kinds built from that image file
+
+    def register(self, kind, build, asset=None):
+        """登記建圖函式 build(facing_right, frame) -> Surface；asset 是 build 讀取的圖檔路徑"""
+        self.builders[kind] = build
+        if asset is not None:
+            self.sources.setdefault(assets.manager.key(asset), set()).add(kind)
+        # Drop images built by a previous builder
+        self.drop(kind)
+
+    def drop(self, kind):
+        """丟棄 kind 所有已產生的圖"""
+        for key in [key for key in self.images if key[0] == kind]:
+            self.shared.discard(id(self.images.pop(key)))
+
+    def asset_released(self, key):
+        """資源管理器淘汰或作廢了 key 這張圖：由它產生的圖也不能再用"""
+        for kind in self.sources.get(key, ()):
+            self.drop(kind)
+
+    def get(self, kind, facing_right=True, frame=0):
+        key = (kind, facing_right, frame)
+        image = self.images.get(key)
+        if image is None:
+            image = self.images[key] = self.builders[kind](facing_right, frame)
+            self.shared.add(id(image))
+        return image
+
+    def is_shared(self, image):
+        return id(image) in self.shared
+
+    def clear(self):
+        self.images.clear()
+        self.shared.clear()
+
+def flip_builder(load):
+    """以 load() 載入朝右的圖，朝左的版本為其水平翻轉"""
+    def build(facing_right, frame):
+        image = load()
+        return image if facing_right else pygame.transform.flip(image, True, False)
+    return build
+
+def template_builder(draw):
+    """不分朝向與影格的模板：draw() 只會被呼叫一次"""
+    def build(facing_right, frame):
+        return draw()
+    return build
+
+images = SpriteImageCache()
+assets.manager.subscribe(images.asset_released)
+
+def register(kind, build, asset=None):
+    images.register(kind, build, asset)
+
+def get(kind, facing_right=True, frame=0):
+    return images.get(kind, facing_right, frame)
+
+def register_template(kind, draw):
+    images.register(kind, template_builder(draw))
+
+def writable(sprite):
+    """copy-on-write：修改 sprite.image（受傷閃爍、染色…）前呼叫，共用的圖會先換成這個實例自己的複本"""
+    if images.is_shared(sprite.image):
+        sprite.image = sprite.image.copy()
+    return sprite.image
@@ -1,11 +1,50 @@
 # sprites.py
 import pygame
-import random
 import math
+import assets
+import rng
+import sprite_cache
 from settings import *
+from spatial import nearest_in, update_index
 vec = pygame.math.Vector2
 
+def load_image(path):
+    """載入圖片（經由資源管理器快取；尚未建立視窗時略過 convert_alpha，供無視窗模式使用）"""
+    return assets.image(path)
+
+def draw_player(facing_right, frame=0):
+    """程序繪製的玩家外觀"""
+    image = pygame.Surface((50, 70), pygame.SRCALPHA)
+    
+    # Colors
+    ROBE_COLOR = (75, 0, 130) # Indigo
+    HOOD_COLOR = (48, 25, 52) # Dark Purple
+    SKIN_COLOR = (20, 20, 20) # Shadowy
+    EYE_COLOR = (0, 255, 255) # Cyan Glow
+    
+    # Draw Robe (Triangle-ish)
+    pygame.draw.polygon(image, ROBE_COLOR, [(10, 70), (40, 70), (35, 20), (15, 20)])
+    pygame.draw.circle(image, HOOD_COLOR, (25, 20), 15)
+    pygame.draw.circle(image, SKIN_COLOR, (25, 22), 8)
+    
+    eye_offset = 2 if facing_right else -2
+    pygame.draw.circle(image, EYE_COLOR, (25 + eye_offset + 3, 22), 2)
+    pygame.draw.circle(image, EYE_COLOR, (25 + eye_offset - 3, 22), 2)
+    
+    staff_x = 45 if facing_right else 5
+    pygame.draw.line(image, (139, 69, 19), (staff_x, 70), (staff_x, 10), 3)
+    pygame.draw.circle(image, (148, 0, 211), (staff_x, 10), 5)
+    return image
+
+sprite_cache.register("player", draw_player)
+sprite_cache.register("player.art", sprite_cache.flip_builder(lambda: load_image("assets/player.png")), "assets/player.png")
+
 class Player(pygame.sprite.Sprite):
+    # Ground shadow: (width, height, alpha), centred at pos + shadow_offset (see shadows.py)
+    shadow = (40, 12, 100)
+    shadow_offset = (25, 65) # Center of sprite width (50), feet
+    render_kind = "player" # Draw pass category (see depth.py)
+
     def __init__(self, x, y):
         super().__init__()
         
@@ -34,50 +73,26 @@ class Player(pygame.sprite.Sprite):
         
         # Try loading custom image
         try:
-            self.original_image = pygame.image.load("assets/player.png").convert_alpha()
-            self.image = self.original_image
-            self.rect = self.image.get_rect()
+            self.image_kind = "player.art"
+            self.image = sprite_cache.get(self.image_kind, self.facing_right)
             self.using_custom_art = True
             print("Loaded custom player art.")
         except FileNotFoundError:
             # Fallback to procedural
-            self.image = pygame.Surface((50, 70), pygame.SRCALPHA)
-            self.rect = self.image.get_rect()
+            self.image_kind = "player"
+            self.image = sprite_cache.get(self.image_kind, self.facing_right)
             self.using_custom_art = False
-            self.render_visuals()
-        
-    def render_visuals(self):
-        if self.using_custom_art: return
-        
-        self.image.fill((0,0,0,0)) # Clear
-        
-        # Colors
-        ROBE_COLOR = (75, 0, 130) # Indigo
-        HOOD_COLOR = (48, 25, 52) # Dark Purple
-        SKIN_COLOR = (20, 20, 20) # Shadowy
-        EYE_COLOR = (0, 255, 255) # Cyan Glow
-        
-        # Draw Robe (Triangle-ish)
-        pygame.draw.polygon(self.image, ROBE_COLOR, [(10, 70), (40, 70), (35, 20), (15, 20)])
-        pygame.draw.circle(self.image, HOOD_COLOR, (25, 20), 15)
-        pygame.draw.circle(self.image, SKIN_COLOR, (25, 22), 8)
-        
-        eye_offset = 2 if self.facing_right else -2
-        pygame.draw.circle(self.image, EYE_COLOR, (25 + eye_offset + 3, 22), 2)
-        pygame.draw.circle(self.image, EYE_COLOR, (25 + eye_offset - 3, 22), 2)
-        
-        staff_x = 45 if self.facing_right else 5
-        pygame.draw.line(self.image, (139, 69, 19), (staff_x, 70), (staff_x, 10), 3)
-        pygame.draw.circle(self.image, (148, 0, 211), (staff_x, 10), 5)
+        self.rect = self.image.get_rect()
 
-    def update(self, physics):
+    def update(self, physics, keys=None):
         # Update timers
         if self.attack_timer > 0:
             self.attack_timer -= 1
         if self.invincible_timer > 0:
             self.invincible_timer -= 1
         
-        keys = pygame.key.get_pressed()
+        if keys is None:
+            keys = pygame.key.get_pressed()
         
         move_x = 0
         move_y = 0
@@ -97,14 +112,8 @@ class Player(pygame.sprite.Sprite):
             input_vec = vec(move_x, move_y).normalize()
             self.vel += input_vec * self.speed
         
-        # Visual Update
-        if self.using_custom_art:
-            if self.facing_right:
-                self.image = self.original_image
-            else:
-                self.image = pygame.transform.flip(self.original_image, True, False)
-        else:
-            self.render_visuals()
+        # Visual Update (shared image per orientation)
+        self.image = sprite_cache.get(self.image_kind, self.facing_right)
 
         # Clamp Speed
         if self.vel.length() > self.max_speed:
@@ -152,20 +161,18 @@ class Player(pygame.sprite.Sprite):
         
         return False
 
-    def draw_shadow(self, surface, camera_offset):
-        # Draw shadow at ground position
-        shadow_rect = pygame.Rect(0, 0, 40, 12)
-        shadow_rect.centerx = int(self.pos.x + 25) # Center of sprite width (50)
-        shadow_rect.centery = int(self.pos.y + 70 - 5)
-        
-        # Apply camera
-        final_rect = shadow_rect.move(camera_offset)
-        
-        s = pygame.Surface((40, 12), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 100), (0, 0, 40, 12))
-        surface.blit(s, final_rect)
+def draw_missile():
+    image = pygame.Surface((10, 10), pygame.SRCALPHA)
+    pygame.draw.circle(image, (0, 255, 255), (5, 5), 5)
+    return image
+
+sprite_cache.register_template("missile", draw_missile)
 
 class MagicMissile(pygame.sprite.Sprite):
+    shadow = (10, 4, 50)
+    shadow_offset = (0, 0)
+    render_kind = "projectile"
+
     def __init__(self, x, y, target_pos):
         super().__init__()
         self.pos = vec(x, y)
@@ -179,9 +186,8 @@ class MagicMissile(pygame.sprite.Sprite):
         self.max_distance = 300
         self.distance_traveled = 0
         
-        # Visuals
-        self.image = pygame.Surface((10, 10), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (0, 255, 255), (5, 5), 5)
+        # Visuals (shared template)
+        self.image = sprite_cache.get("missile")
         self.rect = self.image.get_rect()
         self.rect.center = (int(self.pos.x), int(self.pos.y))
 
@@ -194,35 +200,39 @@ class MagicMissile(pygame.sprite.Sprite):
             
         # Update rect
         self.rect.center = (int(self.pos.x), int(self.pos.y - self.z))
+        update_index(self)
+
+def draw_loot(loot_type):
+    image = pygame.Surface((12, 12), pygame.SRCALPHA)
+    if loot_type == "gold":
+        pygame.draw.circle(image, (255, 215, 0), (6, 6), 5) # Gold
+        pygame.draw.circle(image, (255, 255, 200), (4, 4), 2) # Shine
+    else: # Soul
+        pygame.draw.circle(image, (100, 200, 255), (6, 6), 5) # Blue
+    return image
 
-    def draw_shadow(self, surface, camera_offset):
-        # Small shadow
-        shadow_x = int(self.pos.x + camera_offset[0])
-        shadow_y = int(self.pos.y + camera_offset[1])
-        s = pygame.Surface((10, 4), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 50), (0, 0, 10, 4))
-        surface.blit(s, (shadow_x - 5, shadow_y - 2))
+sprite_cache.register_template("loot.gold", lambda: draw_loot("gold"))
+sprite_cache.register_template("loot.soul", lambda: draw_loot("soul"))
 
 class Loot(pygame.sprite.Sprite):
+    shadow = (10, 4, 50)
+    shadow_offset = (0, 0)
+    render_kind = "loot"
+
     def __init__(self, x, y, loot_type="gold", value=10):
         super().__init__()
         self.pos = vec(x, y)
         self.z = 20 # Start slightly in air
-        self.vel = vec(random.uniform(-2, 2), random.uniform(-2, 2))
-        self.vz = random.uniform(3, 6) # Pop up
+        rand = rng.stream("loot")
+        self.vel = vec(rand.uniform(-2, 2), rand.uniform(-2, 2))
+        self.vz = rand.uniform(3, 6) # Pop up
         
         self.loot_type = loot_type
         self.value = value
         self.is_collected = False
         
-        # Visuals
-        self.image = pygame.Surface((12, 12), pygame.SRCALPHA)
-        if loot_type == "gold":
-            pygame.draw.circle(self.image, (255, 215, 0), (6, 6), 5) # Gold
-            pygame.draw.circle(self.image, (255, 255, 200), (4, 4), 2) # Shine
-        else: # Soul
-            pygame.draw.circle(self.image, (100, 200, 255), (6, 6), 5) # Blue
-            
+        # Visuals (shared template)
+        self.image = sprite_cache.get("loot.gold" if loot_type == "gold" else "loot.soul")
         self.rect = self.image.get_rect()
         self.rect.center = (int(self.pos.x), int(self.pos.y))
         
@@ -249,14 +259,35 @@ class Loot(pygame.sprite.Sprite):
             
         self.rect.center = (int(self.pos.x), int(self.pos.y - self.z))
         
-    def draw_shadow(self, surface, camera_offset):
-        shadow_x = int(self.pos.x + camera_offset[0])
-        shadow_y = int(self.pos.y + camera_offset[1])
-        s = pygame.Surface((10, 4), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 50), (0, 0, 10, 4))
-        surface.blit(s, (shadow_x - 5, shadow_y - 2))
+def draw_ghoul(facing_right, frame=0):
+    """程序繪製的食屍鬼外觀"""
+    image = pygame.Surface((40, 40), pygame.SRCALPHA)
+    
+    BODY_COLOR = (85, 107, 47) # Olive Drab
+    DARK_COLOR = (40, 50, 20)
+    EYE_COLOR = (255, 50, 50) # Red
+    
+    pygame.draw.ellipse(image, BODY_COLOR, (5, 10, 30, 25))
+    
+    head_x = 25 if facing_right else 5
+    pygame.draw.circle(image, BODY_COLOR, (head_x + 5, 15), 10)
+    
+    eye_x = head_x + 8 if facing_right else head_x + 2
+    pygame.draw.circle(image, EYE_COLOR, (eye_x, 13), 2)
+    
+    arm_start = (20, 20)
+    arm_end = (35, 25) if facing_right else (5, 25)
+    pygame.draw.line(image, DARK_COLOR, arm_start, arm_end, 3)
+    return image
+
+sprite_cache.register("ghoul", draw_ghoul)
+sprite_cache.register("ghoul.art", sprite_cache.flip_builder(lambda: load_image("assets/ghoul.png")), "assets/ghoul.png")
 
 class Ghoul(pygame.sprite.Sprite):
+    shadow = (30, 8, 80)
+    shadow_offset = (20, 35)
+    render_kind = "unit"
+
     def __init__(self, x, y, ai_type="commandable", ai_params=None):
         super().__init__()
         
@@ -265,22 +296,22 @@ class Ghoul(pygame.sprite.Sprite):
         self.z = 0
         self.vz = 0
         
-        self.speed = 1.0 + random.uniform(-0.1, 0.1)
+        rand = rng.stream("ghoul")
+        self.speed = 1.0 + rand.uniform(-0.1, 0.1)
         self.threat = 5  # Threat value for enemy targeting
         self.is_grounded = True
-        self.facing_right = random.choice([True, False])
+        self.facing_right = rand.choice([True, False])
         
         # Try loading custom image
         try:
-            self.original_image = pygame.image.load("assets/ghoul.png").convert_alpha()
-            self.image = self.original_image
-            self.rect = self.image.get_rect()
+            self.image_kind = "ghoul.art"
+            self.image = sprite_cache.get(self.image_kind, self.facing_right)
             self.using_custom_art = True
         except FileNotFoundError:
-            self.image = pygame.Surface((40, 40), pygame.SRCALPHA)
-            self.rect = self.image.get_rect()
+            self.image_kind = "ghoul"
+            self.image = sprite_cache.get(self.image_kind, self.facing_right)
             self.using_custom_art = False
-            self.render_visuals()
+        self.rect = self.image.get_rect()
         
         # AI System
         from ai import create_ai
@@ -295,49 +326,23 @@ class Ghoul(pygame.sprite.Sprite):
         self.attack_cooldown = 40
         self.attack_timer = 0
         
-    def render_visuals(self):
-        if self.using_custom_art: return
-        
-        self.image.fill((0,0,0,0))
-        
-        BODY_COLOR = (85, 107, 47) # Olive Drab
-        DARK_COLOR = (40, 50, 20)
-        EYE_COLOR = (255, 50, 50) # Red
-        
-        pygame.draw.ellipse(self.image, BODY_COLOR, (5, 10, 30, 25))
-        
-        head_x = 25 if self.facing_right else 5
-        pygame.draw.circle(self.image, BODY_COLOR, (head_x + 5, 15), 10)
-        
-        eye_x = head_x + 8 if self.facing_right else head_x + 2
-        pygame.draw.circle(self.image, EYE_COLOR, (eye_x, 13), 2)
-        
-        arm_start = (20, 20)
-        arm_end = (35, 25) if self.facing_right else (5, 25)
-        pygame.draw.line(self.image, DARK_COLOR, arm_start, arm_end, 3)
-
-    def update(self, physics, player, enemies=None, game=None):
+    def update(self, physics, player, enemies=None, game=None, run_ai=True):
         # Update timers
         if self.attack_timer > 0:
             self.attack_timer -= 1
         
-        # 使用 AI 系統來決定行為
-        self.ai.update(physics, player, enemies)
+        # 使用 AI 系統來決定行為（run_ai 為 False 時已由 BatchAI 套用）
+        if run_ai:
+            self.ai.update(physics, player, enemies, game.nav if game else None)
         
         # Auto attack
         if enemies and self.attack_timer == 0:
-            closest = min(enemies, key=lambda e: self.pos.distance_to(e.pos))
-            if self.pos.distance_to(closest.pos) < self.attack_range:
+            closest, dist = nearest_in(enemies, self.pos, self.attack_range)
+            if closest and dist < self.attack_range:
                 self.attack(closest)
         
-        # 更新視覺
-        if self.using_custom_art:
-            if self.facing_right:
-                self.image = self.original_image
-            else:
-                self.image = pygame.transform.flip(self.original_image, True, False)
-        else:
-            self.render_visuals()
+        # 更新視覺（依朝向換成共用的圖）
+        self.image = sprite_cache.get(self.image_kind, self.facing_right)
             
         physics.apply_gravity(self)
         physics.apply_physics(self)
@@ -367,18 +372,19 @@ class Ghoul(pygame.sprite.Sprite):
         
         return False
         
-    def draw_shadow(self, surface, camera_offset):
-        shadow_rect = pygame.Rect(0, 0, 30, 8)
-        shadow_rect.centerx = int(self.pos.x + 20)
-        shadow_rect.centery = int(self.pos.y + 40 - 5)
-        
-        final_rect = shadow_rect.move(camera_offset)
-        
-        s = pygame.Surface((30, 8), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 80), (0, 0, 30, 8))
-        surface.blit(s, final_rect)
+def draw_wisp():
+    image = pygame.Surface((20, 20), pygame.SRCALPHA)
+    pygame.draw.circle(image, (200, 255, 255), (10, 10), 8) # Core
+    pygame.draw.circle(image, (100, 255, 255, 100), (10, 10), 12) # Glow
+    return image
+
+sprite_cache.register_template("wisp", draw_wisp)
 
 class Wisp(pygame.sprite.Sprite):
+    shadow = (20, 6, 50)
+    shadow_offset = (0, 0)
+    render_kind = "unit"
+
     def __init__(self, x, y, ai_type="commandable", ai_params=None):
         super().__init__()
         self.pos = vec(x, y)
@@ -391,10 +397,8 @@ class Wisp(pygame.sprite.Sprite):
         self.is_grounded = False
         self.facing_right = True
         
-        # Visuals
-        self.image = pygame.Surface((20, 20), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (200, 255, 255), (10, 10), 8) # Core
-        pygame.draw.circle(self.image, (100, 255, 255, 100), (10, 10), 12) # Glow
+        # Visuals (shared template)
+        self.image = sprite_cache.get("wisp")
         self.rect = self.image.get_rect()
         
         # AI
@@ -410,20 +414,22 @@ class Wisp(pygame.sprite.Sprite):
         self.attack_cooldown = 50
         self.attack_timer = 0
         
-    def update(self, physics, player, enemies=None, game=None):
+    def update(self, physics, player, enemies=None, game=None, run_ai=True):
         if self.attack_timer > 0:
             self.attack_timer -= 1
             
-        self.ai.update(physics, player, enemies)
+        if run_ai:
+            self.ai.update(physics, player, enemies, game.nav if game else None)
         
         # Hover effect
-        self.z = 40 + math.sin(pygame.time.get_ticks() * 0.005) * 5
+        ticks = game.ticks if game else pygame.time.get_ticks()
+        self.z = 40 + math.sin(ticks * 0.005) * 5
         self.vz = 0 # Ignore gravity
         
         # Auto attack
         if enemies and self.attack_timer == 0 and game:
-            closest = min(enemies, key=lambda e: self.pos.distance_to(e.pos))
-            if self.pos.distance_to(closest.pos) < self.attack_range:
+            closest, dist = nearest_in(enemies, self.pos, self.attack_range)
+            if closest and dist < self.attack_range:
                 self.attack(closest, game)
                 
         physics.apply_physics(self)
@@ -436,15 +442,6 @@ class Wisp(pygame.sprite.Sprite):
         game.all_sprites.add(missile)
         self.attack_timer = self.attack_cooldown
         
-    def draw_shadow(self, surface, camera_offset):
-        shadow_rect = pygame.Rect(0, 0, 20, 6)
-        shadow_rect.centerx = int(self.pos.x)
-        shadow_rect.centery = int(self.pos.y)
-        final_rect = shadow_rect.move(camera_offset)
-        s = pygame.Surface((20, 6), pygame.SRCALPHA)
-        pygame.draw.ellipse(s, (0, 0, 0, 50), (0, 0, 20, 6))
-        surface.blit(s, final_rect)
-        
     def take_damage(self, amount):
         """受到傷害"""
         self.hp -= amount
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+ai_equivalence.py
+以相同情境分別用逐一 (scalar) 與批次 (batch) AI 後端執行，逐幀比較所有單位與敵人的位置、速度、朝向
+（敵人另比較狀態），確認批次 AI (ai.BatchAI) 與批次敵人狀態機 (enemy_brain.EnemyBrain) 與原本的逐一 AI 結果一致
+
+用法:
+    python tools/ai_equivalence.py                                  # 比較全部情境
+    python tools/ai_equivalence.py data/scenarios/ai_modes.json --frames 600 --tolerance 1e-6
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+from benchmark import SCENARIO_DIR, load_scenario, build_game
+
+def snapshot(game):
+    """每個單位與敵人的 (名稱, (x, y, vx, vy), (朝右, 狀態))，依群組順序"""
+    entries = []
+    for i, unit in enumerate(game.units):
+        entries.append((f"unit {i}", (unit.pos.x, unit.pos.y, unit.vel.x, unit.vel.y), (unit.facing_right,)))
+    for i, enemy in enumerate(game.enemies):
+        entries.append((f"{enemy.enemy_type} {i}", (enemy.pos.x, enemy.pos.y, enemy.vel.x, enemy.vel.y),
+                        (enemy.facing_right, enemy.state)))
+    return entries
+
+def record(scenario, frames, ai, targeting=None):
+    """執行情境並回傳每幀的快照"""
+    # Both runs reseed the global RNG streams, so they must run one after the other
+    with contextlib.redirect_stdout(io.StringIO()):
+        game, _ = build_game(scenario, ai=ai, targeting=targeting)
+        states = []
+        for _ in range(frames):
+            game.step(1)
+            states.append(snapshot(game))
+    return states
+
+def compare(scenario, frames, tolerance, targeting=None):
+    """回傳比較結果字典"""
+    expected = record(scenario, frames, "scalar", targeting)
+    actual = record(scenario, frames, "batch", targeting)
+    max_error = 0.0
+    first_failure = None
+    for frame, (want, got) in enumerate(zip(expected, actual), 1):
+        problem = None
+        if [name for name, _, _ in want] != [name for name, _, _ in got]:
+            problem = f"entity count {len(want)} != {len(got)}"
+        else:
+            for (name, a, flags_a), (_, b, flags_b) in zip(want, got):
+                error = max(abs(x - y) for x, y in zip(a, b))
+                max_error = max(max_error, error)
+                if error > tolerance:
+                    problem = f"{name} differs by {error:.3g}"
+                elif flags_a != flags_b:
+                    problem = f"{name}: {flags_a} != {flags_b}"
+                if problem:
+                    break
+        if problem:
+            first_failure = (frame, problem)
+            break
+    return {
+        "scenario": scenario["name"],
+        "frames": frames,
+        "max_error": max_error,
+        "failure": first_failure,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Eclipse Contract batch AI equivalence check")
+    parser.add_argument("scenarios", nargs="*", help="情境檔或資料夾（預設 data/scenarios/）")
+    parser.add_argument("--frames", type=int, help="覆寫情境的幀數")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="位置 / 速度的容許誤差")
+    parser.add_argument("--targeting", choices=["exact", "influence"], help="敵人選目標 / 逃跑方式（預設 settings.TARGETING）")
+    args = parser.parse_args()
+
+    paths = []
+    for target in args.scenarios or [SCENARIO_DIR]:
+        if os.path.isdir(target):
+            paths.extend(sorted(os.path.join(target, f) for f in os.listdir(target) if f.endswith('.json')))
+        else:
+            paths.append(target)
+
+    # Assets are loaded with paths relative to the project root
+    paths = [os.path.abspath(p) for p in paths]
+    os.chdir(ROOT)
+
+    failed = False
+    for path in paths:
+        scenario = load_scenario(path)
+        result = compare(scenario, args.frames or scenario.get("frames", 300), args.tolerance, args.targeting)
+        if result["failure"]:
+            frame, problem = result["failure"]
+            failed = True
+            print(f"FAIL {result['scenario']}: frame {frame}: {problem}")
+        else:
+            print(f"ok   {result['scenario']}: {result['frames']} frames, max error {result['max_error']:.3g}")
+
+    pygame.quit()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
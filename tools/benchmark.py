@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+依照 data/scenarios/ 內的情境檔建立標準戰鬥，以無視窗模式執行並以 FrameProfiler 量測 Game.update 各階段耗時
+
+用法:
+    python tools/benchmark.py                          # 執行全部情境
+    python tools/benchmark.py data/scenarios/summon_500.json --frames 600 --out bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Keep stdout clean for the JSON report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+from settings import *
+from ai import AI_TYPES
+from profiler import FrameProfiler
+
+SCENARIO_DIR = os.path.join(ROOT, 'data', 'scenarios')
+
+def load_scenario(path):
+    """讀取情境檔"""
+    with open(path, encoding='utf-8') as f:
+        scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+def random_point(area):
+    x, y, w, h = area
+    return random.uniform(x, x + w), random.uniform(y, y + h)
+
+def spawn_missiles(game, count, area):
+    from sprites import MagicMissile
+    for _ in range(count):
+        x, y = random_point(area)
+        target = pygame.math.Vector2(random_point(area))
+        if target.distance_to((x, y)) < 1:
+            continue
+        missile = MagicMissile(x, y, target)
+        game.projectiles.add(missile)
+        game.all_sprites.add(missile)
+
+def spawn_loot(game, count, area):
+    from sprites import Loot
+    for i in range(count):
+        x, y = random_point(area)
+        loot = Loot(x, y, "gold" if i % 5 else "soul", 10)
+        game.loot.add(loot)
+        game.all_sprites.add(loot)
+
+def build_game(scenario, ai=None, targeting=None):
+    """依情境內容建立一個無視窗的 Game"""
+    from main import Game
+    from sprites import Ghoul, Wisp
+    unit_classes = {"ghoul": Ghoul, "wisp": Wisp}
+
+    random.seed(scenario.get("seed", 0))
+    game = Game(headless=True, seed=scenario.get("seed", 0),
+                ai_backend=ai or scenario.get("ai"),
+                targeting=targeting or scenario.get("targeting"))
+    area = scenario.get("area", [0, GROUND_HORIZON, WORLD_WIDTH, WORLD_HEIGHT - GROUND_HORIZON])
+    if "obstacles" in scenario:
+        game.nav.set_obstacles(scenario["obstacles"])
+
+    if "player" in scenario:
+        game.player.pos.update(*scenario["player"])
+
+    if not scenario.get("default_enemies", False):
+        for enemy in game.enemies:
+            enemy.kill()
+    for enemy_type, count in scenario.get("enemies", {}).items():
+        for _ in range(count):
+            game.spawn_enemy(*random_point(area), enemy_type)
+
+    for entry in scenario.get("units", []):
+        unit_class = unit_classes[entry["type"]]
+        # "*" spreads the count evenly over every AI type
+        ai_types = list(AI_TYPES) if entry.get("ai_type") == "*" else [entry.get("ai_type", "commandable")]
+        for i in range(entry["count"]):
+            ai_type = ai_types[i % len(ai_types)]
+            unit = game.spawn_unit(unit_class, *random_point(area), ai_type=ai_type)
+            if "mode" in entry and hasattr(unit.ai, "set_mode"):
+                unit.ai.set_mode(entry["mode"])
+
+    spawn_missiles(game, scenario.get("missiles", 0), area)
+    spawn_loot(game, scenario.get("loot", 0), area)
+    return game, area
+
+def percentile(sorted_values, pct):
+    """最近排名法百分位數"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+def summarize(samples):
+    """回傳毫秒為單位的 mean / p95 / p99 / max"""
+    values = sorted(samples)
+    n = len(values) or 1
+    return {
+        "mean_ms": round(sum(values) / n * 1000, 4),
+        "p95_ms": round(percentile(values, 95) * 1000, 4),
+        "p99_ms": round(percentile(values, 99) * 1000, 4),
+        "max_ms": round((values[-1] if values else 0) * 1000, 4),
+    }
+
+def run_scenario(scenario, frames=None, ai=None, targeting=None):
+    """執行一個情境並回傳結果字典"""
+    frames = frames or scenario.get("frames", 300)
+    warmup = scenario.get("warmup", 30)
+    refill = scenario.get("refill", True)
+
+    # Silence gameplay prints - they would dominate the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        game, area = build_game(scenario, ai, targeting)
+        game.step(warmup)
+
+        # Fresh profiler sized to hold every measured frame
+        phases = ["events"] + [name for name, _ in game.update_phases]
+        game.profiler = FrameProfiler(phases, history=frames)
+        totals = []
+
+        for _ in range(frames):
+            if refill:
+                # Keep projectiles and loot in flight (outside the timed region)
+                spawn_missiles(game, scenario.get("missiles", 0) - len(game.projectiles), area)
+                spawn_loot(game, scenario.get("loot", 0) - len(game.loot), area)
+            start = time.perf_counter()
+            game.step(1)
+            totals.append(time.perf_counter() - start)
+
+    return {
+        "scenario": scenario["name"],
+        "frames": frames,
+        "ai": "batch" if game.ai_batch else "scalar",
+        "targeting": "influence" if game.nav.influence.active else "exact",
+        "entities": {
+            "units": len(game.units),
+            "enemies": len(game.enemies),
+            "projectiles": len(game.projectiles),
+            "loot": len(game.loot),
+            "particles": len(game.particles),
+        },
+        "collisions": {
+            "pairs_tested_per_frame": round(game.broadphase.total_tested / game.frame, 1),
+            "pairs_skipped_per_frame": round(game.broadphase.total_skipped / game.frame, 1),
+            "candidates_per_frame": round(game.broadphase.total_candidates / game.frame, 1),
+        },
+        "frame": summarize(totals),
+        "phases": {name: summarize(game.profiler.recent(game.profiler.samples[name])) for name in phases},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Eclipse Contract simulation benchmark")
+    parser.add_argument("scenarios", nargs="*", help="情境檔或資料夾（預設 data/scenarios/）")
+    parser.add_argument("--frames", type=int, help="覆寫情境的量測幀數")
+    parser.add_argument("--out", help="輸出 JSON 檔（預設輸出到終端）")
+    parser.add_argument("--ai", choices=["batch", "scalar"], help="覆寫 AI 後端（預設 settings.AI_BACKEND）")
+    parser.add_argument("--targeting", choices=["exact", "influence"], help="覆寫敵人選目標 / 逃跑方式（預設 settings.TARGETING）")
+    args = parser.parse_args()
+
+    paths = []
+    for target in args.scenarios or [SCENARIO_DIR]:
+        if os.path.isdir(target):
+            paths.extend(sorted(os.path.join(target, f) for f in os.listdir(target) if f.endswith('.json')))
+        else:
+            paths.append(target)
+
+    # Assets are loaded with paths relative to the project root
+    paths = [os.path.abspath(p) for p in paths]
+    os.chdir(ROOT)
+
+    results = [run_scenario(load_scenario(p), args.frames, args.ai, args.targeting) for p in paths]
+    report = json.dumps({"results": results}, indent=2)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"Saved to: {args.out}")
+    else:
+        print(report)
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import subprocess
 # Add parent directory to path to import settings
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from settings import *
+import assets
 
 AI_TYPES = ["follow", "guard", "patrol", "aggressive", "flee", "wander"]
 
@@ -391,6 +392,8 @@ class Editor:
                 import shutil
                 dest = os.path.join(self.assets_dir, self.char_data["image"])
                 shutil.copy(file_path, dest)
+                # The cache is keyed by path: drop the image the copy just replaced
+                assets.invalidate(dest)
                 print(f"Copied to: {dest}")
             
             self.load_current_image()
@@ -401,7 +404,7 @@ class Editor:
         if not self.char_data["image"]: return
         path = os.path.join(self.assets_dir, self.char_data["image"])
         try:
-            img = pygame.image.load(path).convert_alpha()
+            img = assets.image(path)
             w = int(img.get_width() * self.char_data["scale"])
             h = int(img.get_height() * self.char_data["scale"])
             self.loaded_image = pygame.transform.scale(img, (w, h))
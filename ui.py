@@ -1,12 +1,13 @@
 import pygame
+import fonts
 from settings import *
 from sprites import Ghoul, Wisp
 
 class SummonUI:
     def __init__(self, game):
         self.game = game
-        self.font = pygame.font.SysFont("Arial", 14)
-        self.title_font = pygame.font.SysFont("Arial", 16, bold=True)
+        self.font = fonts.get_font("Arial", 14)
+        self.title_font = fonts.get_font("Arial", 16, bold=True)
         
         # Unit Types configuration
         self.unit_types = [
@@ -60,17 +61,17 @@ class SummonUI:
             pygame.draw.rect(surface, unit["color"], icon_rect)
             
             # Cost
-            cost_surf = self.font.render(str(unit["cost"]), True, (255, 215, 0))
+            cost_surf = fonts.render(self.font, str(unit["cost"]), (255, 215, 0))
             surface.blit(cost_surf, (x + 5, self.y + 5))
             
             # Key
-            key_surf = self.font.render(unit["key_str"], True, (255, 255, 255))
+            key_surf = fonts.render(self.font, unit["key_str"], (255, 255, 255))
             surface.blit(key_surf, (x + 40, self.y + 40))
             
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1:
-                mx, my = pygame.mouse.get_pos()
+                mx, my = event.pos
                 
                 # Check if clicking on context menu
                 if self.show_menu:
@@ -92,13 +93,13 @@ class SummonUI:
                     x = self.start_x + i * (self.slot_size + self.padding)
                     slot_rect = pygame.Rect(x, self.y, self.slot_size, self.slot_size)
                     if slot_rect.collidepoint(mx, my):
-                        self.summon(unit)
+                        self.game.apply_command(("summon", i))
                         return True
                         
         if event.type == pygame.KEYDOWN:
-            for unit in self.unit_types:
+            for i, unit in enumerate(self.unit_types):
                 if event.key == unit["key"]:
-                    self.summon(unit)
+                    self.game.apply_command(("summon", i))
                     
     def handle_portrait_click(self, mx, my):
         """處理頭像點擊"""
@@ -145,9 +146,9 @@ class SummonUI:
             
             if button_rect.collidepoint(mx, my):
                 # Set mode for this specific unit
-                if hasattr(self.selected_unit, 'ai') and hasattr(self.selected_unit.ai, 'set_mode'):
-                    self.selected_unit.ai.set_mode(mode)
-                    print(f"Set unit mode to {mode}")
+                if self.selected_unit in self.game.units:
+                    unit_index = self.game.units.sprites().index(self.selected_unit)
+                    self.game.apply_command(("set_mode", unit_index, mode))
                 self.show_menu = False
                 self.selected_unit = None
                 self.selected_unit_index = None
@@ -162,10 +163,7 @@ class SummonUI:
             spawn_x = self.game.player.pos.x + (50 if self.game.player.facing_right else -50)
             spawn_y = self.game.player.pos.y
             
-            new_unit = unit_data["class"](spawn_x, spawn_y)
-            
-            self.game.units.add(new_unit)
-            self.game.all_sprites.add(new_unit)
+            self.game.spawn_unit(unit_data["class"], spawn_x, spawn_y)
             self.game.particles.emit_summon_effect(spawn_x, spawn_y)
             print(f"Summoned {unit_data['name']}")
                     
@@ -246,7 +244,7 @@ class SummonUI:
         pygame.draw.rect(surface, (200, 200, 200), menu_rect, 2)
         
         # Title
-        title_surf = self.title_font.render("Mode", True, (255, 255, 255))
+        title_surf = fonts.render(self.title_font, "Mode", (255, 255, 255))
         surface.blit(title_surf, (self.menu_x + 10, self.menu_y + 5))
         
         # Mode buttons
@@ -273,6 +271,6 @@ class SummonUI:
                 
             pygame.draw.rect(surface, (150, 150, 150), button_rect, 1)
             
-            text_surf = self.font.render(label, True, text_color)
+            text_surf = fonts.render(self.font, label, text_color)
             text_rect = text_surf.get_rect(center=button_rect.center)
             surface.blit(text_surf, text_rect)